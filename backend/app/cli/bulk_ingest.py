@@ -0,0 +1,280 @@
+"""
+Bulk-ingest a directory of PDFs and images.
+
+Usage (from backend/):
+    python -m app.cli.bulk_ingest DIR [--workers 4] [--batch-docs 16] [--batch-chunks 1024]
+                                      [--manifest PATH] [--retry-failed] [--no-recursive]
+
+Files are read in place (nothing is copied to UPLOAD_DIR). Extraction and
+chunking run on parallel worker threads; embedding, NER and the ChromaDB write
+are batched across documents (PDFs of STREAMING_INGEST_MIN_PAGES pages or
+more are streamed on their worker instead). Every finished file is appended to a checkpoint
+manifest (JSON lines), so rerunning the same command after an interruption
+skips what is already done. Files whose content is already ingested are
+recorded as duplicates and skipped.
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+from app.services import document_registry
+from app.services.ingestion import (
+    prepare_document, embed_documents, add_chunk_entities, store_documents,
+    ingest_document_streaming,
+)
+from app.services.ocr_service import is_supported_file, get_page_count
+from app.services.vector_store import delete_document, sync_document_registry
+
+FINISHED_STATUSES = {"done", "duplicate"}
+
+
+def find_files(root: Path, recursive: bool = True) -> list[Path]:
+    """Supported files under root, in a stable order so runs are reproducible."""
+    pattern = "**/*" if recursive else "*"
+    return sorted(p for p in root.glob(pattern) if p.is_file() and is_supported_file(str(p)))
+
+
+def hash_file(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class Manifest:
+    """Append-only JSON-lines checkpoint: the last record for a path wins."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.records: dict[str, dict] = {}
+        if path.exists():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from an interrupted write
+                    self.records[record["path"]] = record
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def status(self, path: str) -> Optional[str]:
+        record = self.records.get(path)
+        return record["status"] if record else None
+
+    def record(self, path: str, status: str, **fields):
+        record = {"path": path, "status": status, "at": datetime.now().isoformat(), **fields}
+        with self._lock:
+            self.records[path] = record
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class BulkIngester:
+    """Runs the ingestion stages over many files, batching embedding + storage."""
+
+    def __init__(self, manifest: Manifest, workers: int = 4, batch_docs: int = 16, batch_chunks: int = 1024):
+        self.manifest = manifest
+        self.workers = max(1, workers)
+        self.batch_docs = max(1, batch_docs)
+        self.batch_chunks = max(1, batch_chunks)
+        self.stats = Counter()
+        self.failures: list[tuple[str, str]] = []
+        self._hashes_in_run: dict[str, str] = {}  # hash → path, for duplicates within this run
+        self._lock = threading.Lock()
+        self._started = 0.0
+
+    # ── Worker side: hash, dedup, extract + chunk ──
+
+    def _prepare(self, path: Path) -> Optional[dict]:
+        """Returns the prepared document, or None if the file is a duplicate."""
+        key = str(path)
+        file_hash = hash_file(path)
+
+        existing = document_registry.find_by_hash(file_hash)
+        with self._lock:
+            first_path = self._hashes_in_run.setdefault(file_hash, key)
+            is_duplicate = existing is not None or first_path != key
+            if is_duplicate:
+                self.stats["duplicates"] += 1
+        if is_duplicate:
+            duplicate_of = existing["id"] if existing else first_path
+            self.manifest.record(key, "duplicate", file_hash=file_hash, duplicate_of=duplicate_of)
+            return None
+
+        doc_id = str(uuid.uuid4())[:8]
+        if get_page_count(key) >= settings.STREAMING_INGEST_MIN_PAGES:
+            # Too large to hold in a batch: stream it through on this worker
+            result = ingest_document_streaming(doc_id, key, path.name, file_hash=file_hash)
+            self._record_done(key, doc_id, file_hash, result.page_count, result.total_chunks)
+            return None
+        return prepare_document(doc_id, key, path.name, file_hash=file_hash)
+
+    # ── Main thread: batched embedding, NER and storage ──
+
+    def _flush(self, batch: list[dict]):
+        if not batch:
+            return
+        try:
+            self._store(batch)
+        except Exception:
+            # Roll the batch back and retry one by one so a single bad
+            # document doesn't fail its neighbours
+            for doc in batch:
+                delete_document(doc["doc_id"])
+            for doc in batch:
+                try:
+                    self._store([doc])
+                except Exception as e:
+                    delete_document(doc["doc_id"])
+                    self._fail(doc["path"], e)
+        self._report()
+
+    def _store(self, batch: list[dict]):
+        embed_documents(batch)
+        for doc in batch:
+            add_chunk_entities(doc)
+        counts = store_documents(batch)
+        for doc, count in zip(batch, counts):
+            self._record_done(doc["path"], doc["doc_id"], doc["file_hash"], doc["file_meta"]["page_count"], count)
+
+    def _record_done(self, path: str, doc_id: str, file_hash: str, pages: int, chunks: int):
+        self.manifest.record(path, "done", document_id=doc_id, file_hash=file_hash, pages=pages, chunks=chunks)
+        with self._lock:
+            self.stats["documents"] += 1
+            self.stats["pages"] += pages
+            self.stats["chunks"] += chunks
+
+    def _fail(self, path: str, error: Exception):
+        message = f"{type(error).__name__}: {error}"
+        self.manifest.record(path, "failed", error=message)
+        with self._lock:
+            self.failures.append((path, message))
+            self.stats["failed"] += 1
+
+    def _report(self):
+        elapsed = max(time.perf_counter() - self._started, 1e-9)
+        done = self.stats["documents"] + self.stats["duplicates"] + self.stats["failed"]
+        print(
+            f"📦 {done}/{self.stats['total']} files"
+            f" | {self.stats['pages'] / elapsed:.1f} pages/s"
+            f" | {self.stats['chunks'] / elapsed:.1f} chunks/s"
+            f" | {self.stats['duplicates']} duplicate | {self.stats['failed']} failed",
+            flush=True,
+        )
+
+    def run(self, files: list[Path]):
+        self.stats["total"] = len(files)
+        self._started = time.perf_counter()
+        pending_files = iter(files)
+        in_flight = {}
+        batch, batch_chunks = [], 0
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bulk-ingest") as pool:
+            try:
+                while True:
+                    # Keep a bounded window of files being extracted
+                    while len(in_flight) < self.workers * 2:
+                        path = next(pending_files, None)
+                        if path is None:
+                            break
+                        in_flight[pool.submit(self._prepare, path)] = path
+                    if not in_flight:
+                        break
+
+                    finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        path = in_flight.pop(future)
+                        try:
+                            doc = future.result()
+                        except Exception as e:
+                            self._fail(str(path), e)
+                            continue
+                        if doc is None:
+                            continue
+                        doc["path"] = str(path)
+                        batch.append(doc)
+                        batch_chunks += sum(len(c) for _, c, _ in doc["page_results"])
+
+                    if len(batch) >= self.batch_docs or batch_chunks >= self.batch_chunks:
+                        self._flush(batch)
+                        batch, batch_chunks = [], 0
+
+                self._flush(batch)
+            except KeyboardInterrupt:
+                for future in in_flight:
+                    future.cancel()
+                print("\n⚠️  Interrupted — finished files are checkpointed; rerun to resume.")
+                raise
+
+    def summary(self) -> dict:
+        elapsed = time.perf_counter() - self._started
+        errors = Counter(message for _, message in self.failures)
+        return {
+            "files": self.stats["total"],
+            "ingested": self.stats["documents"],
+            "duplicates": self.stats["duplicates"],
+            "failed": self.stats["failed"],
+            "pages": self.stats["pages"],
+            "chunks": self.stats["chunks"],
+            "seconds": round(elapsed, 1),
+            "pages_per_second": round(self.stats["pages"] / elapsed, 2) if elapsed else 0.0,
+            "chunks_per_second": round(self.stats["chunks"] / elapsed, 2) if elapsed else 0.0,
+            "top_errors": errors.most_common(10),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", nargs="?", default=settings.SAMPLE_PDF_DIR,
+                        help=f"Directory to ingest (default: {settings.SAMPLE_PDF_DIR})")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel extraction threads")
+    parser.add_argument("--batch-docs", type=int, default=16, help="Max documents per embedding/store batch")
+    parser.add_argument("--batch-chunks", type=int, default=1024, help="Max chunks per embedding/store batch")
+    parser.add_argument("--manifest", default=None,
+                        help="Checkpoint file (default: DIR/.bulk_ingest_manifest.jsonl)")
+    parser.add_argument("--retry-failed", action="store_true", help="Retry files that failed in earlier runs")
+    parser.add_argument("--no-recursive", action="store_true", help="Only ingest files directly in DIR")
+    args = parser.parse_args()
+
+    root = Path(args.directory).resolve()
+    if not root.is_dir():
+        parser.error(f"{root} is not a directory")
+
+    manifest = Manifest(Path(args.manifest) if args.manifest else root / ".bulk_ingest_manifest.jsonl")
+    skip = FINISHED_STATUSES | (set() if args.retry_failed else {"failed"})
+    files = find_files(root, recursive=not args.no_recursive)
+    todo = [p for p in files if manifest.status(str(p)) not in skip]
+    print(f"🔎 {len(files)} supported files in {root}; {len(files) - len(todo)} already checkpointed.")
+
+    sync_document_registry()
+    ingester = BulkIngester(
+        manifest, workers=args.workers, batch_docs=args.batch_docs, batch_chunks=args.batch_chunks,
+    )
+    try:
+        ingester.run(todo)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        manifest.close()
+        summary = ingester.summary()
+        print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
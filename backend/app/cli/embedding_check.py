@@ -0,0 +1,53 @@
+"""
+Compare the PyTorch and quantized ONNX embedding backends.
+
+Usage (from backend/):
+    python -m app.cli.embedding_check [--samples 500] [--batch-size 32]
+
+Uses chunks from the vector store as the sample corpus (falls back to a small
+built-in corpus when the store is empty) and prints throughput, cosine
+agreement, and nearest-neighbour overlap between the two backends.
+"""
+
+import argparse
+import json
+
+from app.services.embedding_service import compare_backends
+from app.services.vector_store import get_collection
+
+FALLBACK_CORPUS = [
+    "Invoice number 4821 issued to Garrett Gonzales on 12 March 2021.",
+    "Total amount due: $1,240.50, payable within 30 days.",
+    "The seller's tax ID is 932-75-6582.",
+    "Shipping address: 221B Baker Street, London.",
+    "Payment received by bank transfer, thank you for your business.",
+    "Quarterly report on regional sales performance and growth targets.",
+    "The contract terminates automatically unless renewed in writing.",
+    "Patient presented with mild fever and was prescribed rest.",
+    "Neural networks learn hierarchical representations of data.",
+    "The committee approved the budget for the next fiscal year.",
+    "Delivery was delayed due to severe weather conditions.",
+    "Please sign and return the attached agreement by Friday.",
+]
+
+
+def load_sample_texts(limit: int) -> list[str]:
+    stored = get_collection().get(limit=limit, include=["documents"])["documents"]
+    return stored if len(stored) >= 2 else FALLBACK_CORPUS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=500, help="Max chunks to sample from the store")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--top-k", type=int, default=10, help="Neighbours compared per text")
+    args = parser.parse_args()
+
+    texts = load_sample_texts(args.samples)
+    print(f"🔬 Comparing backends on {len(texts)} texts...")
+    report = compare_backends(texts, batch_size=args.batch_size, top_k=args.top_k)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -17,21 +17,83 @@ class Settings(BaseSettings):
 
     # Embedding Model
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    EMBEDDING_BACKEND: str = "torch"                  # "torch" or "onnx" (int8-quantized, CPU)
+    EMBEDDING_ONNX_DIR: str = "./data/onnx_models"    # Where the quantized export is cached
+    EMBEDDING_ONNX_QUANTIZATION: str = "avx2"         # "avx2", "avx512", "avx512_vnni" or "arm64"
+    EMBEDDING_MAX_BATCH_SIZE: int = 64   # Texts per micro-batch forward pass
+    EMBEDDING_MAX_WAIT_MS: float = 5.0   # How long a batch waits for more requests
+    QUERY_EMBEDDING_CACHE_SIZE: int = 10000
+    QUERY_EMBEDDING_CACHE_PATH: str = ""  # e.g. ./data/query_cache.db to persist across restarts
 
     # OCR
-    TESSERACT_CMD: str = "tesseract"  # Path to tesseract binary
+    TESSERACT_CMD: str = "tesseract"  # Path to tesseract binary (pytesseract engine)
+    OCR_ENGINE: str = "tesserocr"     # "tesserocr" (pooled in-process API) or "pytesseract" (subprocess)
+    OCR_ENGINE_POOL_SIZE: int = 4     # Tesseract API handles per process (tesserocr engine)
+    OCR_COMPARISON_PAGES: int = 0     # Also OCR the first N text-layer PDF pages, to compare with digital text
+    OCR_WORKERS: int = 1              # >1 OCRs PDF pages in parallel on a process pool
+    # Scanned PDF pages render at the DPI that makes glyphs about OCR_TARGET_GLYPH_PX tall
+    OCR_DPI_MIN: int = 150
+    OCR_DPI_MAX: int = 300
+    OCR_TARGET_GLYPH_PX: int = 24
+    # Which preprocessing stages run per page: "fast", "balanced" or "max_quality"
+    # (max_quality runs every stage, except deskew without a confident angle;
+    # see preprocessing.PREPROCESSING_PROFILES)
+    PREPROCESSING_PROFILE: str = "balanced"
+    DESKEW_MIN_CONFIDENCE: float = 0.3  # Rotate only when the skew estimate is at least this sure (0-1)
+
+    # Preprocessing stage images: "off" (production, never rendered) or
+    # "store" (debug, saved to a content-addressed store and served by URL)
+    PREPROCESSING_ARTIFACTS: str = "off"
+    ARTIFACT_DIR: str = "./data/artifacts"
 
     # spaCy NER Model
     SPACY_MODEL: str = "en_core_web_sm"
+    NER_BATCH_SIZE: int = 64    # Texts per nlp.pipe() batch at ingestion
+    NER_N_PROCESS: int = 1      # >1 runs ingestion NER in worker processes
 
     # Ollama (Free & Local LLM for RAG chatbot)
     OLLAMA_BASE_URL: str = "http://localhost:11434"
     OLLAMA_MODEL: str = "tinyllama"  # lightweight model (~1.5GB RAM)
+    OLLAMA_TIMEOUT: float = 120.0    # Seconds to wait for a response (or the next streamed token)
+    OLLAMA_HEALTH_TTL: float = 15.0  # Seconds an availability check is reused
+
+    # Page-level cache (OCR by rendered-page hash, chunks + embeddings by page text)
+    PAGE_CACHE_ENABLED: bool = True
+    PAGE_CACHE_PATH: str = "./data/page_cache.db"
+
+    # Ingestion job queue
+    INGEST_WORKERS: int = 2         # Documents processed concurrently
+    INGEST_QUEUE_SIZE: int = 16     # Extra jobs allowed to wait; beyond this uploads get 429
+    INGEST_JOB_HISTORY: int = 500   # Finished jobs kept for status queries
+
+    # Streaming ingestion (large PDFs: pages extracted, embedded and stored in batches)
+    STREAMING_INGEST_MIN_PAGES: int = 100   # PDFs with at least this many pages stream
+    PDF_PAGE_WINDOW: int = 16               # Pages extracted (and OCR'd in parallel) at a time
+    INGEST_BATCH_CHUNKS: int = 256          # Chunks embedded + stored per batch when streaming
+
+    # Document registry (one row per document: list, stats, duplicate lookup)
+    DOCUMENT_REGISTRY_PATH: str = "./data/documents.db"
 
     # Search
     TOP_K_RESULTS: int = 10
-    CHUNK_SIZE: int = 500       # Characters per text chunk
-    CHUNK_OVERLAP: int = 50     # Overlap between chunks
+    CHUNK_TOKENS: int = 256         # Tokens per chunk (capped at the embedding model's max length)
+    CHUNK_OVERLAP_TOKENS: int = 32  # Tokens shared by consecutive chunks
+
+    # Keyword search (persistent BM25 inverted index)
+    KEYWORD_INDEX_PATH: str = "./data/keyword_index.db"
+    KEYWORD_STEMMING: bool = False  # Light suffix stripping (changing it rebuilds the index)
+    BM25_K1: float = 1.5
+    BM25_B: float = 0.75
+
+    # Hybrid search (both legs run concurrently, then fused by chunk id)
+    HYBRID_FUSION: str = "rrf"           # "rrf", "minmax" or "zscore"
+    HYBRID_SEMANTIC_WEIGHT: float = 0.7  # 0.0 = pure keyword, 1.0 = pure semantic
+    HYBRID_CANDIDATE_MULTIPLIER: int = 2 # Per-leg candidates = top_k * multiplier
+    HYBRID_LEG_WORKERS: int = 4          # Threads running the semantic leg
+    RRF_K: int = 60                      # Reciprocal rank fusion damping constant
+
+    # Search result cache (invalidated whenever documents are added or deleted)
+    SEARCH_CACHE_SIZE: int = 1000        # Cached requests (0 disables the cache)
 
     class Config:
         env_file = ".env"
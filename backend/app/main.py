@@ -3,16 +3,31 @@ Document Intelligence & Semantic Search Platform
 Main FastAPI application entry point.
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.routers import documents, search, chat
+from app.routers import documents, search, chat, artifacts
 from app.core.config import settings
+from app.services.chat_service import close_http_client
+from app.services.embedding_cache import flush_query_cache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Release pooled Ollama connections on shutdown
+    await close_http_client()
+    # Write query-cache recency from recent hits to the disk tier
+    flush_query_cache()
+
 
 app = FastAPI(
     title=settings.APP_NAME,
     description="AI-powered document ingestion, OCR, semantic search, and Q&A platform.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS - allow React frontend
@@ -28,6 +43,7 @@ app.add_middleware(
 app.include_router(documents.router, prefix="/api")
 app.include_router(search.router, prefix="/api")
 app.include_router(chat.router, prefix="/api")
+app.include_router(artifacts.router, prefix="/api")
 
 
 @app.get("/")
@@ -38,9 +54,11 @@ async def root():
         "docs": "/docs",
         "endpoints": {
             "upload": "POST /api/documents/upload",
+            "job_status": "GET /api/documents/jobs/{job_id}",
             "list_docs": "GET /api/documents/",
             "search": "POST /api/search/",
             "chat": "POST /api/chat/",
+            "chat_stream": "POST /api/chat/stream",
             "stats": "GET /api/documents/stats",
         },
     }
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
 
@@ -16,13 +16,15 @@ class TextBlock(BaseModel):
 class PageExtractionDetail(BaseModel):
     """Per-page extraction info showing both methods."""
     page: int
-    primary_method: str          # "digital" or "ocr"
+    primary_method: str          # "digital", "ocr" or "mixed" (text layer + OCR of image regions)
     has_digital: bool
     has_ocr: bool
     digital_preview: str = ""
     ocr_preview: str = ""
     block_count: int = 0         # Number of text blocks (layout info)
-    preprocessing_steps: Optional[dict] = None  # Base64 thumbnails of each step
+    preprocessing_steps: Optional[dict] = None  # Stage name → artifact URL (debug mode only)
+    preprocessing_plan: Optional[dict] = None   # OCR'd pages: profile, page stats, stages run + why, timings
+    extraction_decision: Optional[dict] = None  # Text-layer policy: action, reason, scores
 
 
 class DocumentUploadResponse(BaseModel):
@@ -37,12 +39,47 @@ class DocumentUploadResponse(BaseModel):
     message: str
 
 
+class IngestionJobResponse(BaseModel):
+    """Returned immediately by the upload endpoint; processing continues in the background."""
+    job_id: str
+    document_id: str
+    filename: str
+    status: str
+    status_url: str
+    message: str
+
+
+class IngestionJobStatus(BaseModel):
+    """Progress of a background ingestion job."""
+    job_id: str
+    document_id: str
+    filename: str
+    status: str                  # "queued", "running", "completed", "failed", "cancelled"
+    stage: str                   # "queued", "extracting", "chunking", "embedding", "ner", "storing", "done"
+    pages_done: int = 0
+    pages_total: int = 0
+    error: Optional[str] = None
+    result: Optional[DocumentUploadResponse] = None
+    created_at: str
+    updated_at: str
+
+
 class DocumentInfo(BaseModel):
     id: str
     filename: str
     page_count: int
     upload_date: str
     chunk_count: int
+    file_type: str = ""
+    file_hash: Optional[str] = None
+    file_size: int = 0              # Bytes on disk
+    text_length: int = 0            # Characters of extracted text
+    status: str = "processed"       # "processed" or "empty" (no text found)
+
+
+class DocumentListResponse(BaseModel):
+    documents: list[DocumentInfo]
+    next_cursor: Optional[str] = None   # Pass back as ?cursor= for the next page
 
 
 # ── Search Models ──
@@ -51,15 +88,20 @@ class SearchRequest(BaseModel):
     query: str
     search_type: str = "semantic"   # "semantic", "keyword", "hybrid"
     top_k: int = 10
+    # Hybrid only (defaults come from settings)
+    fusion: Optional[str] = None    # "rrf", "minmax", "zscore"
+    semantic_weight: Optional[float] = Field(None, ge=0.0, le=1.0)
+    candidate_k: Optional[int] = None
 
 
 class SearchResult(BaseModel):
+    chunk_id: str = ""
     document_id: str
     filename: str
     chunk_text: str
     page_number: int
     score: float
-    extraction_method: str = ""     # "digital" or "ocr"
+    extraction_method: str = ""     # "digital", "ocr" or "mixed"
     entities: list[dict] = []
 
 
@@ -68,6 +110,7 @@ class SearchResponse(BaseModel):
     search_type: str
     results: list[SearchResult]
     total_results: int
+    timings: dict = {}              # Cache hit/miss; hybrid: per-leg and fusion times (ms)
 
 
 # ── NER Models ──
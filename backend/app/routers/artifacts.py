@@ -0,0 +1,28 @@
+"""
+Preprocessing artifact endpoint (debug mode).
+Serves content-addressed stage images with immutable cache headers.
+"""
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+
+from app.services.artifact_store import get_artifact_path, ARTIFACT_MEDIA_TYPE
+
+router = APIRouter(prefix="/artifacts", tags=["Artifacts"])
+
+# Content never changes for a given key, so clients may cache it forever
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@router.get("/{key}")
+async def get_artifact(key: str, request: Request):
+    """Return a stored preprocessing stage image by its SHA-256 key."""
+    path = get_artifact_path(key)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Artifact not found.")
+
+    headers = {"ETag": f'"{key}"', "Cache-Control": CACHE_CONTROL}
+    if request.headers.get("if-none-match") in (f'"{key}"', key):
+        return Response(status_code=304, headers=headers)
+
+    return FileResponse(path, media_type=ARTIFACT_MEDIA_TYPE, headers=headers)
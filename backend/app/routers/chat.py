@@ -2,10 +2,13 @@
 RAG Chatbot endpoints (Optional feature).
 """
 
-from fastapi import APIRouter
+import json
+
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
 
 from app.models.schemas import ChatRequest, ChatResponse, SearchResult
-from app.services.chat_service import chat_with_documents
+from app.services.chat_service import chat_with_documents, stream_chat_with_documents
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
@@ -13,9 +16,34 @@ router = APIRouter(prefix="/chat", tags=["Chat"])
 @router.post("/", response_model=ChatResponse)
 async def ask_question(request: ChatRequest):
     """Ask a question and get an answer grounded in uploaded documents."""
-    result = chat_with_documents(request.question, top_k=request.top_k)
+    result = await chat_with_documents(request.question, top_k=request.top_k)
 
     return ChatResponse(
         answer=result["answer"],
         sources=[SearchResult(**s) for s in result["sources"]],
     )
+
+
+@router.post("/stream")
+async def ask_question_stream(request: ChatRequest, http_request: Request):
+    """
+    Stream an answer as NDJSON: a "sources" event first, then "token" events as
+    the model generates, then "done" (or "error"). Generation is cancelled when
+    the client disconnects.
+    """
+    async def ndjson():
+        events = stream_chat_with_documents(
+            request.question,
+            top_k=request.top_k,
+            is_disconnected=http_request.is_disconnected,
+        )
+        async for event in events:
+            if event["type"] == "sources":
+                event["sources"] = [SearchResult(**s).model_dump() for s in event["sources"]]
+            yield json.dumps(event) + "\n"
+
+    return StreamingResponse(
+        ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
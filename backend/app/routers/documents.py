@@ -1,44 +1,59 @@
 """
-Document management endpoints: upload, list, view, delete.
+Document management endpoints: upload, ingestion job status, list, delete.
 Accepts both PDF and image files (JPG, PNG, TIFF, BMP).
 """
 
+import hashlib
 import uuid
-import shutil
 from pathlib import Path
-from datetime import datetime
+from typing import Optional
 
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 
 from app.core.config import settings
-from app.models.schemas import DocumentUploadResponse, DocumentInfo, PageExtractionDetail
-from app.services.ocr_service import (
-    extract_text_from_file, get_file_metadata, chunk_text,
+from app.models.schemas import (
+    DocumentInfo, DocumentListResponse, IngestionJobResponse, IngestionJobStatus,
 )
-from app.services.embedding_service import generate_embeddings
-from app.services.vector_store import add_document_chunks, get_all_documents, delete_document, get_collection_count
-from app.services.ner_service import extract_entities_summary
+from app.services.vector_store import delete_document, sync_document_registry
+from app.services.ingestion import build_duplicate_response
+from app.services import document_registry, job_queue
 
 router = APIRouter(prefix="/documents", tags=["Documents"])
 
 
 ALLOWED_EXTENSIONS = {".pdf", ".jpg", ".jpeg", ".png", ".tiff", ".tif", ".bmp", ".webp"}
 
+# Checked once per process: backfills the registry from ChromaDB if needed
+_registry_synced = False
 
-@router.post("/upload", response_model=DocumentUploadResponse)
+
+async def _ensure_registry():
+    global _registry_synced
+    if not _registry_synced:
+        await run_in_threadpool(sync_document_registry)
+        _registry_synced = True
+
+
+@router.post("/upload", response_model=IngestionJobResponse, status_code=202)
 async def upload_document(file: UploadFile = File(...)):
     """
-    Upload a document (PDF or image) and run the full pipeline:
-    1. Save file
-    2. Extract text (digital for PDFs / full OCR for images)
-    3. Image preprocessing (grayscale → denoise → CLAHE → deskew → binarize)
-    4. Preserve layout info (text blocks with bounding boxes)
-    5. Chunk text with sentence-aware overlap
-    6. Generate sentence-transformer embeddings
-    7. Store chunks + embeddings + metadata in ChromaDB
-    8. Run spaCy NER to extract named entities
+    Upload a document (PDF or image) and queue it for background processing.
+    The file is saved and a job id returned immediately; the pipeline then runs
+    on a worker (see GET /documents/jobs/{job_id} for progress):
+    1. Extract text (digital for PDFs / full OCR for images)
+    2. Adaptive image preprocessing (only the needed stages of denoise → CLAHE → deskew → binarize)
+    3. Preserve layout info (text blocks with bounding boxes)
+    4. Chunk text to the embedding model's token budget, ending at sentences
+    5. Generate sentence-transformer embeddings
+    6. Store chunks + embeddings + metadata in ChromaDB
+    7. Run spaCy NER to extract named entities
+
+    Files whose SHA-256 matches an already-ingested (or in-flight) document are
+    linked to that document instead of being processed again.
 
     Supported formats: PDF, JPG, JPEG, PNG, TIFF, BMP, WebP
+    Returns 429 when the ingestion queue is full.
     """
 
     # Validate file extension
@@ -49,111 +64,119 @@ async def upload_document(file: UploadFile = File(...)):
             detail=f"Unsupported file type '{ext}'. Accepted: {', '.join(sorted(ALLOWED_EXTENSIONS))}",
         )
 
-    # Save uploaded file
+    # Reject before writing anything if the backlog is already full
+    if not job_queue.has_capacity():
+        raise HTTPException(status_code=429, detail="Ingestion queue is full. Retry later.")
+
+    # Save uploaded file, hashing it as it streams to disk
     doc_id = str(uuid.uuid4())[:8]
     upload_path = Path(settings.UPLOAD_DIR) / f"{doc_id}_{file.filename}"
+    file_hash = _save_and_hash(file, upload_path)
 
-    with open(upload_path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
+    # Same content already ingested → reuse that document, no re-processing
+    await _ensure_registry()
+    existing = document_registry.find_by_hash(file_hash)
+    if existing is not None:
+        upload_path.unlink(missing_ok=True)
+        result = build_duplicate_response(existing, file.filename)
+        job = job_queue.record_completed_job(existing["id"], file.filename, result.model_dump(), file_hash)
+        return _job_response(job, result.message)
 
     try:
-        # 1. Extract text (auto-detects PDF vs image)
-        pages = extract_text_from_file(str(upload_path))
-        full_text = "\n\n".join([p["text"] for p in pages if p["text"]])
-        file_meta = get_file_metadata(str(upload_path))
-
-        # 2. Chunk text
-        chunks = []
-        chunk_metadatas = []
-        for page_data in pages:
-            page_chunks = chunk_text(
-                page_data["text"],
-                chunk_size=settings.CHUNK_SIZE,
-                overlap=settings.CHUNK_OVERLAP,
-            )
-            for chunk in page_chunks:
-                chunks.append(chunk)
-                chunk_metadatas.append({
-                    "document_id": doc_id,
-                    "filename": file.filename,
-                    "page_number": page_data["page_number"],
-                    "page_count": file_meta["page_count"],
-                    "extraction_method": page_data["method"],
-                    "file_type": file_meta["file_type"],
-                    "upload_date": datetime.now().isoformat(),
-                })
-
-        # 3. Generate embeddings + store in ChromaDB
-        stored_count = 0
-        if chunks:
-            embeddings = generate_embeddings(chunks)
-            stored_count = add_document_chunks(doc_id, chunks, embeddings, chunk_metadatas)
-
-        # 4. Extract entities (NER)
-        entities = []
-        try:
-            entity_summary = extract_entities_summary(full_text[:10000])
-            entities = [{"label": k, "values": v} for k, v in entity_summary.items()]
-        except Exception:
-            pass
-
-        # 5. Build per-page extraction details
-        extraction_details = []
-        for page_data in pages:
-            text_blocks = page_data.get("text_blocks") or []
-            detail = PageExtractionDetail(
-                page=page_data["page_number"],
-                primary_method=page_data["method"],
-                has_digital=page_data.get("digital_text") is not None,
-                has_ocr=page_data.get("ocr_text") is not None,
-                digital_preview=(page_data.get("digital_text") or "")[:300],
-                ocr_preview=(page_data.get("ocr_text") or "")[:300],
-                block_count=len(text_blocks),
-                preprocessing_steps=page_data.get("preprocessing_steps"),
-            )
-            extraction_details.append(detail)
-
-        file_type_label = file_meta["file_type"].upper()
-        return DocumentUploadResponse(
-            id=doc_id,
-            filename=file.filename,
-            page_count=file_meta["page_count"],
-            total_chunks=stored_count,
-            status="processed",
-            extracted_text_preview=full_text[:500] + "..." if len(full_text) > 500 else full_text,
-            entities=entities,
-            extraction_details=extraction_details,
-            message=f"[{file_type_label}] Processed {file_meta['page_count']} page(s) → {stored_count} chunks embedded and stored.",
-        )
+        job = job_queue.submit_job(doc_id, str(upload_path), file.filename, file_hash=file_hash)
+    except job_queue.QueueFullError as e:
+        upload_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=429, detail=str(e))
 
-    except Exception as e:
+    # Same content is already being processed → follow that job instead
+    if job["document_id"] != doc_id:
         upload_path.unlink(missing_ok=True)
-        raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
-
-
-@router.get("/", response_model=list[DocumentInfo])
-async def list_documents():
-    """List all uploaded documents."""
-    docs = get_all_documents()
-    return [
-        DocumentInfo(
-            id=d["id"],
-            filename=d["filename"],
-            page_count=d.get("page_count", 0),
-            upload_date=d.get("upload_date", ""),
-            chunk_count=0,
+        return _job_response(job, f"'{file.filename}' is already being processed.")
+
+    return _job_response(job, f"Queued '{file.filename}' for processing.")
+
+
+def _save_and_hash(file: UploadFile, upload_path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """Stream an upload to disk and return its SHA-256 hex digest."""
+    sha256 = hashlib.sha256()
+    with open(upload_path, "wb") as f:
+        while chunk := file.file.read(chunk_size):
+            sha256.update(chunk)
+            f.write(chunk)
+    return sha256.hexdigest()
+
+
+def _job_response(job: dict, message: str) -> IngestionJobResponse:
+    return IngestionJobResponse(
+        job_id=job["job_id"],
+        document_id=job["document_id"],
+        filename=job["filename"],
+        status=job["status"],
+        status_url=f"/api/documents/jobs/{job['job_id']}",
+        message=message,
+    )
+
+
+@router.get("/jobs", response_model=list[IngestionJobStatus])
+async def list_jobs():
+    """List tracked ingestion jobs, newest first."""
+    return [IngestionJobStatus(**job) for job in job_queue.list_jobs()]
+
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobStatus)
+async def get_job_status(job_id: str):
+    """Get the stage, page progress and result (or error) of an ingestion job."""
+    job = job_queue.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found.")
+    return IngestionJobStatus(**job)
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=IngestionJobStatus)
+async def cancel_job(job_id: str):
+    """Cancel a queued or running ingestion job."""
+    job = job_queue.cancel_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found.")
+    return IngestionJobStatus(**job)
+
+
+@router.get("/", response_model=DocumentListResponse)
+async def list_documents(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort: str = "upload_date",
+    order: str = "desc",
+    filename: Optional[str] = None,
+    status: Optional[str] = None,
+    file_type: Optional[str] = None,
+):
+    """
+    List documents one page at a time (newest first by default).
+    sort: upload_date, filename, page_count, chunk_count or file_size.
+    filename filters by substring; status and file_type match exactly.
+    Follow next_cursor (with the same sort/filters) to fetch the next page.
+    """
+    await _ensure_registry()
+    try:
+        docs, next_cursor = document_registry.list_documents(
+            limit=limit, cursor=cursor, sort=sort, order=order,
+            filename=filename, status=status, file_type=file_type,
         )
-        for d in docs
-    ]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return DocumentListResponse(
+        documents=[DocumentInfo(**d) for d in docs],
+        next_cursor=next_cursor,
+    )
 
 
 @router.get("/stats")
 async def get_stats():
-    """Get collection statistics."""
-    return {
-        "total_chunks": get_collection_count(),
-        "total_documents": len(get_all_documents()),
-    }
+    """Get collection statistics (running totals kept by the document registry)."""
+    await _ensure_registry()
+    return document_registry.get_stats()
 
 
 @router.delete("/{doc_id}")
@@ -2,10 +2,13 @@
 Search endpoints: semantic, keyword, and hybrid search.
 """
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 
 from app.models.schemas import SearchRequest, SearchResponse, SearchResult
-from app.services.search_service import semantic_search, keyword_search, hybrid_search
+from app.services.search_service import run_search, FUSION_STRATEGIES
+from app.services.search_cache import get_search_cache
+from app.services.embedding_cache import get_query_cache
 
 router = APIRouter(prefix="/search", tags=["Search"])
 
@@ -14,18 +17,38 @@ router = APIRouter(prefix="/search", tags=["Search"])
 async def search_documents(request: SearchRequest):
     """Search across all documents using semantic, keyword, or hybrid search."""
 
-    if request.search_type == "semantic":
-        results = semantic_search(request.query, top_k=request.top_k)
-    elif request.search_type == "keyword":
-        results = keyword_search(request.query, top_k=request.top_k)
-    elif request.search_type == "hybrid":
-        results = hybrid_search(request.query, top_k=request.top_k)
-    else:
-        results = semantic_search(request.query, top_k=request.top_k)
+    if request.fusion is not None and request.fusion not in FUSION_STRATEGIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fusion '{request.fusion}'. Use one of: {', '.join(FUSION_STRATEGIES)}",
+        )
+
+    # Run off the event loop so concurrent queries can be batched by the embedder
+    timings = {}
+    results = await run_in_threadpool(
+        run_search,
+        request.search_type,
+        request.query,
+        top_k=request.top_k,
+        timings=timings,
+        fusion=request.fusion,
+        semantic_weight=request.semantic_weight,
+        candidate_k=request.candidate_k,
+    )
 
     return SearchResponse(
         query=request.query,
         search_type=request.search_type,
         results=[SearchResult(**r) for r in results],
         total_results=len(results),
+        timings=timings,
     )
+
+
+@router.get("/stats")
+async def search_stats():
+    """Cache statistics for monitoring (hit ratios, sizes)."""
+    return {
+        "query_embedding_cache": get_query_cache().stats(),
+        "search_result_cache": get_search_cache().stats(),
+    }
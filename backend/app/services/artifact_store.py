@@ -0,0 +1,77 @@
+"""
+Content-addressed store for preprocessing stage images (debug artifacts).
+
+Each stage thumbnail is JPEG-encoded and saved under its SHA-256, so identical
+images are stored once and a URL can be cached forever by clients.
+Only used when settings.PREPROCESSING_ARTIFACTS == "store".
+"""
+
+import hashlib
+import io
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+from app.core.config import settings
+from app.services.preprocessing import cv2_to_pil
+
+ARTIFACT_URL_PREFIX = "/api/artifacts"
+ARTIFACT_MEDIA_TYPE = "image/jpeg"
+
+_KEY_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def artifacts_enabled() -> bool:
+    """True when stage images should be rendered and stored."""
+    return settings.PREPROCESSING_ARTIFACTS == "store"
+
+
+def save_image(img: np.ndarray, max_width: int = 400) -> str:
+    """Store a CV2 image as a JPEG thumbnail. Returns its content key."""
+    data = _encode_thumbnail(img, max_width=max_width)
+    key = hashlib.sha256(data).hexdigest()
+
+    path = _key_path(key)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so concurrent writers never expose a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    return key
+
+
+def artifact_url(key: str) -> str:
+    return f"{ARTIFACT_URL_PREFIX}/{key}"
+
+
+def get_artifact_path(key: str) -> Optional[Path]:
+    """Path of a stored artifact, or None if the key is invalid or unknown."""
+    if not _KEY_RE.match(key):
+        return None
+    path = _key_path(key)
+    return path if path.exists() else None
+
+
+def _key_path(key: str) -> Path:
+    return Path(settings.ARTIFACT_DIR) / key[:2] / f"{key}.jpg"
+
+
+def _encode_thumbnail(img: np.ndarray, max_width: int = 400) -> bytes:
+    """Convert a CV2 image to small JPEG bytes."""
+    pil_img = cv2_to_pil(img)
+    w, h = pil_img.size
+    if w > max_width:
+        ratio = max_width / w
+        pil_img = pil_img.resize((max_width, int(h * ratio)), Image.LANCZOS)
+
+    buffer = io.BytesIO()
+    pil_img.save(buffer, format="JPEG", quality=60)
+    return buffer.getvalue()
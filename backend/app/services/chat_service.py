@@ -2,50 +2,89 @@
 RAG (Retrieval Augmented Generation) chatbot service.
 Uses search results as context for Ollama LLM-powered Q&A.
 
+Talks to Ollama through one shared, connection-pooled httpx.AsyncClient.
+Answers can be returned whole or streamed token by token; availability comes
+from a cached health state instead of probing Ollama before every question.
+
 100% free & local — no API keys needed.
 """
 
-import requests
+import asyncio
+import json
+import time
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+import httpx
+from fastapi.concurrency import run_in_threadpool
+
 from app.core.config import settings
-from app.services.search_service import semantic_search
+from app.services.search_service import run_search
 
+OLLAMA_NOT_RUNNING = (
+    "⚠️ Ollama is not running. Start it with:\n\n"
+    "  1. `ollama serve`  (in a separate terminal)\n"
+    "  2. `ollama pull tinyllama`  (download model if not already)\n\n"
+    "Ollama is free and runs 100% locally."
+)
+NO_DOCUMENTS = "I couldn't find any relevant documents to answer your question. Please upload some PDFs first."
+
+SYSTEM_PROMPT = """You are a helpful document assistant. Answer the user's question based ONLY on the provided document context.
+    - If the answer is found in the documents, cite which source it came from (e.g., Source 1, Source 2).
+    - If the context doesn't contain enough information, say so honestly.
+    - Be concise and accurate."""
+
+# Shared HTTP client + cached Ollama health
+_client: Optional[httpx.AsyncClient] = None
+_health = {"available": False, "checked_at": 0.0}
+_health_lock = asyncio.Lock()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get or create the pooled client used for every Ollama call."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=settings.OLLAMA_BASE_URL,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            timeout=httpx.Timeout(settings.OLLAMA_TIMEOUT, connect=5.0),
+        )
+    return _client
 
-def check_ollama_available() -> bool:
-    """Check if Ollama server is running."""
-    try:
-        resp = requests.get(f"{settings.OLLAMA_BASE_URL}/api/tags", timeout=3)
-        return resp.status_code == 200
-    except requests.ConnectionError:
-        return False
 
+async def close_http_client():
+    """Close the shared client (called on application shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
 
-def chat_with_documents(question: str, top_k: int = 20) -> dict:
+
+def _set_health(available: bool):
+    _health["available"] = available
+    _health["checked_at"] = time.monotonic()
+
+
+async def check_ollama_available() -> bool:
     """
-    Answer a question using retrieved document context (RAG).
-    Pipeline: semantic search → build context → Ollama LLM → return answer + sources.
+    Whether Ollama is reachable, from a health state cached for OLLAMA_HEALTH_TTL
+    seconds. Only one request re-probes /api/tags when the state has expired.
     """
-    # Check Ollama is running
-    if not check_ollama_available():
-        return {
-            "answer": (
-                "⚠️ Ollama is not running. Start it with:\n\n"
-                "  1. `ollama serve`  (in a separate terminal)\n"
-                "  2. `ollama pull tinyllama`  (download model if not already)\n\n"
-                "Ollama is free and runs 100% locally."
-            ),
-            "sources": [],
-        }
-
-    # 1. Retrieve relevant chunks
-    search_results = semantic_search(question, top_k=top_k)
+    if time.monotonic() - _health["checked_at"] < settings.OLLAMA_HEALTH_TTL:
+        return _health["available"]
 
-    if not search_results:
-        return {
-            "answer": "I couldn't find any relevant documents to answer your question. Please upload some PDFs first.",
-            "sources": [],
-        }
+    async with _health_lock:
+        if time.monotonic() - _health["checked_at"] < settings.OLLAMA_HEALTH_TTL:
+            return _health["available"]
+        try:
+            resp = await get_http_client().get("/api/tags", timeout=3)
+            _set_health(resp.status_code == 200)
+        except httpx.HTTPError:
+            _set_health(False)
+    return _health["available"]
 
-    # 2. Build context from search results
+
+def _build_messages(question: str, search_results: list[dict]) -> list[dict]:
+    """Assemble the system + user prompt with labelled source context."""
     context_parts = []
     for i, result in enumerate(search_results):
         context_parts.append(
@@ -53,12 +92,6 @@ def chat_with_documents(question: str, top_k: int = 20) -> dict:
         )
     context = "\n\n---\n\n".join(context_parts)
 
-    # 3. Generate answer with Ollama
-    system_prompt = """You are a helpful document assistant. Answer the user's question based ONLY on the provided document context. 
-    - If the answer is found in the documents, cite which source it came from (e.g., Source 1, Source 2).
-    - If the context doesn't contain enough information, say so honestly.
-    - Be concise and accurate."""
-
     user_prompt = f"""Context from documents:
 {context}
 
@@ -66,34 +99,112 @@ Question: {question}
 
 Answer based on the documents above:"""
 
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt},
+    ]
+
+
+def _chat_payload(messages: list[dict], stream: bool) -> dict:
+    return {
+        "model": settings.OLLAMA_MODEL,
+        "messages": messages,
+        "stream": stream,
+        "options": {
+            "temperature": 0.3,
+            "num_predict": 1000,
+            "num_gpu": 0,
+        },
+    }
+
+
+def _error_message(e: Exception) -> str:
+    if isinstance(e, httpx.TimeoutException):
+        return "⚠️ Ollama took too long to respond. The model may still be loading — try again in a moment."
+    if isinstance(e, httpx.HTTPError):
+        return f"⚠️ Error communicating with Ollama: {str(e)}"
+    return "⚠️ Unexpected response from Ollama. Make sure the model is downloaded: `ollama pull tinyllama`"
+
+
+async def chat_with_documents(question: str, top_k: int = 20) -> dict:
+    """
+    Answer a question using retrieved document context (RAG).
+    Pipeline: semantic search → build context → Ollama LLM → return answer + sources.
+    """
+    if not await check_ollama_available():
+        return {"answer": OLLAMA_NOT_RUNNING, "sources": []}
+
+    # 1. Retrieve relevant chunks (blocking work runs off the event loop)
+    search_results = await run_in_threadpool(run_search, "semantic", question, top_k=top_k)
+    if not search_results:
+        return {"answer": NO_DOCUMENTS, "sources": []}
+
+    # 2. Generate answer with Ollama
     try:
-        response = requests.post(
-            f"{settings.OLLAMA_BASE_URL}/api/chat",
-            json={
-                "model": settings.OLLAMA_MODEL,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-                "stream": False,
-                "options": {
-                    "temperature": 0.3,
-                    "num_predict": 1000,
-                    "num_gpu": 0,
-                },
-            },
-            timeout=120,
+        response = await get_http_client().post(
+            "/api/chat", json=_chat_payload(_build_messages(question, search_results), stream=False)
         )
         response.raise_for_status()
         answer = response.json()["message"]["content"]
-    except requests.Timeout:
-        answer = "⚠️ Ollama took too long to respond. The model may still be loading — try again in a moment."
-    except requests.RequestException as e:
-        answer = f"⚠️ Error communicating with Ollama: {str(e)}"
-    except (KeyError, ValueError):
-        answer = "⚠️ Unexpected response from Ollama. Make sure the model is downloaded: `ollama pull tinyllama`"
+    except httpx.ConnectError as e:
+        _set_health(False)
+        answer = _error_message(e)
+    except (httpx.HTTPError, KeyError, ValueError) as e:
+        answer = _error_message(e)
 
     return {
         "answer": answer,
         "sources": search_results,
     }
+
+
+async def stream_chat_with_documents(
+    question: str,
+    top_k: int = 20,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+) -> AsyncIterator[dict]:
+    """
+    Streaming RAG answer. Yields events in order:
+      {"type": "sources", "sources": [...]}   — as soon as retrieval is done
+      {"type": "token", "content": "..."}     — as Ollama produces them
+      {"type": "done"} or {"type": "error", "message": "..."}
+
+    Generation stops (and the Ollama request is closed) when is_disconnected()
+    reports that the client has gone away, or when the consumer stops iterating.
+    """
+    if not await check_ollama_available():
+        yield {"type": "sources", "sources": []}
+        yield {"type": "error", "message": OLLAMA_NOT_RUNNING}
+        return
+
+    search_results = await run_in_threadpool(run_search, "semantic", question, top_k=top_k)
+    yield {"type": "sources", "sources": search_results}
+    if not search_results:
+        yield {"type": "token", "content": NO_DOCUMENTS}
+        yield {"type": "done"}
+        return
+
+    payload = _chat_payload(_build_messages(question, search_results), stream=True)
+    try:
+        async with get_http_client().stream("POST", "/api/chat", json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if is_disconnected is not None and await is_disconnected():
+                    return  # leaving the block closes the stream → Ollama stops generating
+                if not line:
+                    continue
+                data = json.loads(line)
+                content = data.get("message", {}).get("content", "")
+                if content:
+                    yield {"type": "token", "content": content}
+                if data.get("done"):
+                    break
+    except httpx.ConnectError as e:
+        _set_health(False)
+        yield {"type": "error", "message": _error_message(e)}
+        return
+    except (httpx.HTTPError, ValueError) as e:
+        yield {"type": "error", "message": _error_message(e)}
+        return
+
+    yield {"type": "done"}
@@ -0,0 +1,131 @@
+"""
+Token-budget text chunker.
+
+Chunk length is measured with the embedding model's own tokenizer, so chunks
+fill the model's input (settings.CHUNK_TOKENS, capped at its max sequence
+length) without being truncated by it. Each chunk ends at the last sentence
+boundary inside the budget (or the last word boundary if there is none past
+the half-way mark), and the next chunk starts CHUNK_OVERLAP_TOKENS earlier.
+
+The text is tokenized once and chunks are sliced out of it by character
+offset, so the work is linear in the text length. Every chunk carries its
+[start, end) character offsets in the source text.
+"""
+
+import re
+import threading
+from typing import Optional
+
+from app.core.config import settings
+
+# Sentence ends: terminal punctuation (optionally closed by a quote/bracket)
+# followed by whitespace, or a blank line
+_SENTENCE_END_RE = re.compile(r"[.!?][\"')\]]*\s+|\n\s*\n")
+_WORD_RE = re.compile(r"\S+")
+
+_tokenizer = None
+_tokenizer_lock = threading.Lock()
+
+
+def get_tokenizer():
+    """The embedding model's tokenizer, or None if it has no character offsets."""
+    global _tokenizer
+    if _tokenizer is None:
+        with _tokenizer_lock:
+            if _tokenizer is None:
+                from app.services.embedding_service import get_model
+                tokenizer = get_model().tokenizer
+                _tokenizer = tokenizer if getattr(tokenizer, "is_fast", False) else False
+    return _tokenizer or None
+
+
+def token_budget() -> int:
+    """Tokens per chunk: CHUNK_TOKENS capped at the model's max sequence length."""
+    from app.services.embedding_service import get_model
+    max_len = get_model().max_seq_length - 2  # [CLS] + [SEP]
+    return max(16, min(settings.CHUNK_TOKENS, max_len))
+
+
+def token_spans(text: str) -> list[tuple[int, int]]:
+    """Character (start, end) of every token, from the model tokenizer if possible."""
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        # Slow tokenizers give no offsets; whitespace words are a close proxy
+        return [m.span() for m in _WORD_RE.finditer(text)]
+    encoding = tokenizer(
+        text, add_special_tokens=False, return_offsets_mapping=True, verbose=False,
+    )
+    return [span for span in encoding["offset_mapping"] if span[1] > span[0]]
+
+
+def chunk_text_spans(
+    text: str,
+    max_tokens: Optional[int] = None,
+    overlap_tokens: Optional[int] = None,
+    spans: Optional[list[tuple[int, int]]] = None,
+) -> list[dict]:
+    """
+    Split text into chunks of at most max_tokens tokens with overlap_tokens of
+    overlap. Returns [{"text", "start", "end", "tokens"}, ...] where start/end
+    are character offsets into text. spans overrides the tokenizer (testing).
+    """
+    if not text or not text.strip():
+        return []
+    if max_tokens is None:
+        max_tokens = token_budget()
+    if overlap_tokens is None:
+        overlap_tokens = settings.CHUNK_OVERLAP_TOKENS
+    overlap_tokens = max(0, min(overlap_tokens, max_tokens // 2))
+    if spans is None:
+        spans = token_spans(text)
+
+    n = len(spans)
+    if n == 0:
+        return []
+
+    # Per-token boundary flags, computed in one pass over the text
+    sentence_ends = {m.end() for m in _SENTENCE_END_RE.finditer(text)}
+    starts_sentence = [False] * n
+    starts_word = [False] * n
+    for i, (start, _) in enumerate(spans):
+        starts_word[i] = i == 0 or start > spans[i - 1][1] or text[start - 1].isspace()
+        starts_sentence[i] = i == 0 or start in sentence_ends
+
+    chunks = []
+    first = 0
+    while first < n:
+        limit = first + max_tokens
+        if limit >= n:
+            cut = n
+        else:
+            cut = _find_cut(first, limit, starts_sentence, starts_word, max_tokens)
+
+        start_char, end_char = spans[first][0], spans[cut - 1][1]
+        chunks.append({
+            "text": text[start_char:end_char],
+            "start": start_char,
+            "end": end_char,
+            "tokens": cut - first,
+        })
+        if cut >= n:
+            break
+
+        # Step back by the overlap, to the start of a word, but always advance
+        next_first = max(cut - overlap_tokens, first + 1)
+        while next_first < cut and not starts_word[next_first]:
+            next_first += 1
+        first = next_first
+
+    return chunks
+
+
+def _find_cut(first: int, limit: int, starts_sentence: list[bool], starts_word: list[bool], max_tokens: int) -> int:
+    """Exclusive end token of a chunk starting at first that may not pass limit."""
+    floor = first + max_tokens // 2
+    for i in range(limit, floor, -1):
+        if starts_sentence[i]:
+            return i
+    for i in range(limit, first, -1):
+        if starts_word[i]:
+            return i
+    return limit  # one word longer than the budget: hard cut
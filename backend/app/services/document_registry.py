@@ -0,0 +1,224 @@
+"""
+Document registry.
+
+One SQLite row per ingested document (id, filename, hash, sizes, page and chunk
+counts, status, upload date), written by the vector store in the same call that
+stores or deletes the document's chunks. Listing, hash lookups and stats read
+from here instead of scanning chunk metadata in ChromaDB:
+  - list_documents()  → keyset (cursor) pagination over an indexed sort column
+  - get_stats()       → running totals kept in the meta table, O(1)
+"""
+
+import base64
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+
+SORT_FIELDS = ("upload_date", "filename", "page_count", "chunk_count", "file_size")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id          TEXT PRIMARY KEY,
+    filename    TEXT NOT NULL,
+    file_hash   TEXT,
+    file_type   TEXT NOT NULL DEFAULT '',
+    page_count  INTEGER NOT NULL DEFAULT 0,
+    chunk_count INTEGER NOT NULL DEFAULT 0,
+    file_size   INTEGER NOT NULL DEFAULT 0,
+    text_length INTEGER NOT NULL DEFAULT 0,
+    status      TEXT NOT NULL,
+    upload_date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_documents_hash ON documents(file_hash);
+CREATE INDEX IF NOT EXISTS idx_documents_upload_date ON documents(upload_date, id);
+CREATE INDEX IF NOT EXISTS idx_documents_filename ON documents(filename, id);
+CREATE INDEX IF NOT EXISTS idx_documents_page_count ON documents(page_count, id);
+CREATE INDEX IF NOT EXISTS idx_documents_chunk_count ON documents(chunk_count, id);
+CREATE INDEX IF NOT EXISTS idx_documents_file_size ON documents(file_size, id);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+_COLUMNS = (
+    "id", "filename", "file_hash", "file_type", "page_count", "chunk_count",
+    "file_size", "text_length", "status", "upload_date",
+)
+
+# Running totals: meta key → documents column summed into it (None = row count)
+_TOTALS = {
+    "total_documents": None,
+    "total_chunks": "chunk_count",
+    "total_pages": "page_count",
+    "total_bytes": "file_size",
+}
+
+_conn = None
+_lock = threading.RLock()
+
+
+def get_connection() -> sqlite3.Connection:
+    """Get or create the SQLite connection for the registry."""
+    global _conn
+    if _conn is None:
+        with _lock:
+            if _conn is None:
+                path = Path(settings.DOCUMENT_REGISTRY_PATH)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(str(path), check_same_thread=False)
+                conn.row_factory = sqlite3.Row
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                _conn = conn
+    return _conn
+
+
+def _adjust_totals(conn: sqlite3.Connection, row, sign: int) -> None:
+    for key, column in _TOTALS.items():
+        delta = sign * (1 if column is None else row[column])
+        conn.execute(
+            "INSERT INTO meta(key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = value + excluded.value",
+            (key, delta),
+        )
+
+
+def _delete_row(conn: sqlite3.Connection, doc_id: str) -> bool:
+    row = conn.execute("SELECT * FROM documents WHERE id = ?", (doc_id,)).fetchone()
+    if row is None:
+        return False
+    conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+    _adjust_totals(conn, row, -1)
+    return True
+
+
+# ──────────────────────────────────────────────────────────────────
+# Writes (called by the vector store)
+# ──────────────────────────────────────────────────────────────────
+
+def upsert_documents(documents: list[dict]) -> None:
+    """Insert or replace document records in one transaction; missing fields take their defaults."""
+    conn = get_connection()
+    with _lock, conn:
+        for document in documents:
+            record = {
+                "file_hash": None, "file_type": "", "page_count": 0, "chunk_count": 0,
+                "file_size": 0, "text_length": 0, "status": "processed",
+                **{k: v for k, v in document.items() if k in _COLUMNS},
+            }
+            _delete_row(conn, record["id"])
+            conn.execute(
+                f"INSERT INTO documents({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in _COLUMNS)})",
+                [record[c] for c in _COLUMNS],
+            )
+            _adjust_totals(conn, record, +1)
+
+
+def remove_document(doc_id: str) -> bool:
+    """Remove a document record. Returns False if it was not registered."""
+    conn = get_connection()
+    with _lock, conn:
+        return _delete_row(conn, doc_id)
+
+
+# ──────────────────────────────────────────────────────────────────
+# Reads
+# ──────────────────────────────────────────────────────────────────
+
+def get_document(doc_id: str) -> Optional[dict]:
+    conn = get_connection()
+    with _lock:
+        row = conn.execute("SELECT * FROM documents WHERE id = ?", (doc_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def find_by_hash(file_hash: str) -> Optional[dict]:
+    """An already-registered document with the same file content hash, if any."""
+    conn = get_connection()
+    with _lock:
+        row = conn.execute(
+            "SELECT * FROM documents WHERE file_hash = ? LIMIT 1", (file_hash,)
+        ).fetchone()
+    return dict(row) if row else None
+
+
+def get_stats() -> dict:
+    """Registry totals (documents, chunks, pages, bytes) from the running counters."""
+    conn = get_connection()
+    with _lock:
+        values = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+    return {key: values.get(key, 0) for key in _TOTALS}
+
+
+def encode_cursor(value, doc_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([value, doc_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Inverse of encode_cursor; raises ValueError for a malformed cursor."""
+    try:
+        value, doc_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    return value, doc_id
+
+
+def list_documents(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    sort: str = "upload_date",
+    order: str = "desc",
+    filename: Optional[str] = None,
+    status: Optional[str] = None,
+    file_type: Optional[str] = None,
+) -> tuple[list[dict], Optional[str]]:
+    """
+    One page of documents plus the cursor for the next page (None on the last).
+    Keyset pagination on (sort column, id): each page is an index range scan,
+    so deep pages cost the same as the first.
+    filename matches as a case-insensitive substring; status/file_type exactly.
+    """
+    if sort not in SORT_FIELDS:
+        raise ValueError(f"Unknown sort field '{sort}'. Use one of: {', '.join(SORT_FIELDS)}")
+    if order not in ("asc", "desc"):
+        raise ValueError("order must be 'asc' or 'desc'")
+
+    where, params = [], []
+    if filename:
+        where.append("filename LIKE ? ESCAPE '\\'")
+        escaped = filename.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        params.append(f"%{escaped}%")
+    if status:
+        where.append("status = ?")
+        params.append(status)
+    if file_type:
+        where.append("file_type = ?")
+        params.append(file_type)
+    if cursor:
+        value, doc_id = decode_cursor(cursor)
+        where.append(f"({sort}, id) {'<' if order == 'desc' else '>'} (?, ?)")
+        params.extend([value, doc_id])
+
+    sql = "SELECT * FROM documents"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    direction = order.upper()
+    sql += f" ORDER BY {sort} {direction}, id {direction} LIMIT ?"
+    params.append(limit + 1)
+
+    conn = get_connection()
+    with _lock:
+        rows = [dict(r) for r in conn.execute(sql, params).fetchall()]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][sort], rows[-1]["id"])
+    return rows, next_cursor
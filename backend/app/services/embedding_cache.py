@@ -0,0 +1,191 @@
+"""
+Query embedding cache.
+
+Bounded LRU of query embeddings keyed by (model name, normalized text), with
+hit/miss counters and an optional SQLite tier so a restarted worker starts warm.
+Entries from a different EMBEDDING_MODEL are never returned, and the
+persistent tier is wiped when the configured model changes.
+"""
+
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+
+# Disk-tier recency updates from cache hits are written in batches: after this
+# many hits or this many seconds, whichever comes first
+TOUCH_BATCH_SIZE = 64
+TOUCH_FLUSH_SECONDS = 5.0
+
+
+def normalize_query(text: str) -> str:
+    """Unicode-normalize and collapse whitespace (case is kept: models may be cased)."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class QueryEmbeddingCache:
+    """Thread-safe LRU cache of query embeddings with an optional disk tier."""
+
+    def __init__(self, model_name: str, max_entries: int = 10000, persist_path: str = ""):
+        self.model_name = model_name
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._touched: dict[str, float] = {}  # key → last hit time not yet written to disk
+        self._last_flush = time.monotonic()
+        if persist_path:
+            self._open_persistent(persist_path)
+
+    def get(self, text: str) -> Optional[list[float]]:
+        key = normalize_query(text)
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if self._conn is not None:
+                # Keep the disk tier's last_used (trim + warm-up order) in LRU order
+                self._touched[key] = time.time()
+                if (len(self._touched) >= TOUCH_BATCH_SIZE
+                        or time.monotonic() - self._last_flush >= TOUCH_FLUSH_SECONDS):
+                    self._flush_touches()
+            return embedding
+
+    def put(self, text: str, embedding: list[float]):
+        key = normalize_query(text)
+        with self._lock:
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+            evicted = False
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted = True
+
+            if self._conn is not None:
+                self._touched.pop(key, None)
+                if evicted:
+                    self._flush_touches()  # trim by up-to-date recency
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO query_embeddings(key, embedding, last_used) VALUES (?, ?, ?)",
+                        (key, array("f", embedding).tobytes(), time.time()),
+                    )
+                    if evicted:
+                        self._conn.execute(
+                            "DELETE FROM query_embeddings WHERE key NOT IN "
+                            "(SELECT key FROM query_embeddings ORDER BY last_used DESC LIMIT ?)",
+                            (self.max_entries,),
+                        )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self._touched.clear()
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute("DELETE FROM query_embeddings")
+
+    def flush(self):
+        """Write pending hit recency to the disk tier (e.g. at shutdown)."""
+        with self._lock:
+            self._flush_touches()
+
+    def _flush_touches(self):
+        """Write batched last_used updates from cache hits (caller holds the lock)."""
+        self._last_flush = time.monotonic()
+        if not self._touched or self._conn is None:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "UPDATE query_embeddings SET last_used = ? WHERE key = ?",
+                [(used, key) for key, used in self._touched.items()],
+            )
+        self._touched.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "model": self.model_name,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "persistent": self._conn is not None,
+            }
+
+    def _open_persistent(self, path: str):
+        """Open the disk tier, dropping it if built for another model, and warm the LRU."""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS query_embeddings (
+                key       TEXT PRIMARY KEY,
+                embedding BLOB NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        """)
+
+        with conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'model'").fetchone()
+            if row is None or row[0] != self.model_name:
+                conn.execute("DELETE FROM query_embeddings")
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta(key, value) VALUES ('model', ?)", (self.model_name,)
+                )
+
+        # Most recently used entries, oldest first so LRU order is preserved
+        rows = conn.execute(
+            "SELECT key, embedding FROM ("
+            "  SELECT key, embedding, last_used FROM query_embeddings ORDER BY last_used DESC LIMIT ?"
+            ") ORDER BY last_used ASC",
+            (self.max_entries,),
+        ).fetchall()
+        for key, blob in rows:
+            embedding = array("f")
+            embedding.frombytes(blob)
+            self._entries[key] = embedding.tolist()
+
+        self._conn = conn
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_query_cache() -> QueryEmbeddingCache:
+    """Get the process-wide cache, rebuilding it if the embedding model has changed."""
+    global _cache
+    model_name = f"{settings.EMBEDDING_MODEL}@{settings.EMBEDDING_BACKEND}"
+    with _cache_lock:
+        if _cache is None or _cache.model_name != model_name:
+            _cache = QueryEmbeddingCache(
+                model_name,
+                max_entries=settings.QUERY_EMBEDDING_CACHE_SIZE,
+                persist_path=settings.QUERY_EMBEDDING_CACHE_PATH,
+            )
+        return _cache
+
+
+def flush_query_cache():
+    """Persist pending hit recency of the process-wide cache, if one was created."""
+    with _cache_lock:
+        cache = _cache
+    if cache is not None:
+        cache.flush()
@@ -0,0 +1,112 @@
+"""
+Dynamic micro-batching for embedding requests.
+
+Concurrent encode calls from search, chat and ingestion are queued and run
+together on one dedicated worker thread, so the model sees a few large
+batches instead of many batch-of-1 forward passes.
+
+  - A batch starts with the highest-priority request waiting and collects
+    more requests until max_batch_size texts or max_wait_ms has passed.
+  - Interactive requests (queries) always go before bulk requests
+    (ingestion). Bulk calls are split into max_batch_size pieces, so a large
+    upload never holds the worker for longer than one batch.
+"""
+
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable
+
+import numpy as np
+
+# Priorities (lower runs first)
+INTERACTIVE = 0
+BULK = 1
+
+
+class _Request:
+    __slots__ = ("texts", "future")
+
+    def __init__(self, texts: list[str]):
+        self.texts = texts
+        self.future = Future()
+
+
+class EmbeddingScheduler:
+    """Collects encode requests into micro-batches on a worker thread."""
+
+    def __init__(
+        self,
+        encode_fn: Callable[[list[str]], np.ndarray],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+    ):
+        self._encode_fn = encode_fn
+        self._max_batch_size = max(1, max_batch_size)
+        self._max_wait = max_wait_ms / 1000
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()  # FIFO order within a priority
+        self._thread = threading.Thread(
+            target=self._run, name="embedding-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, texts: list[str], priority: int = INTERACTIVE) -> list[Future]:
+        """Queue texts for encoding. Returns one future per batch-sized piece."""
+        futures = []
+        for start in range(0, len(texts), self._max_batch_size):
+            request = _Request(texts[start:start + self._max_batch_size])
+            self._queue.put((priority, next(self._seq), request))
+            futures.append(request.future)
+        return futures
+
+    def encode(self, texts: list[str], priority: int = INTERACTIVE) -> np.ndarray:
+        """Encode texts through the scheduler and wait for the result."""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        parts = [future.result() for future in self.submit(texts, priority)]
+        return parts[0] if len(parts) == 1 else np.vstack(parts)
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            texts = [text for request in batch for text in request.texts]
+            try:
+                embeddings = self._encode_fn(texts)
+            except BaseException as e:
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            offset = 0
+            for request in batch:
+                n = len(request.texts)
+                request.future.set_result(embeddings[offset:offset + n])
+                offset += n
+
+    def _collect_batch(self) -> list[_Request]:
+        """Block for the first request, then gather more until full or timed out."""
+        _, _, first = self._queue.get()
+        batch = [first]
+        size = len(first.texts)
+        deadline = time.monotonic() + self._max_wait
+
+        while size < self._max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+
+            request = item[2]
+            if size + len(request.texts) > self._max_batch_size:
+                self._queue.put(item)  # keeps its priority and position
+                break
+            batch.append(request)
+            size += len(request.texts)
+
+        return batch
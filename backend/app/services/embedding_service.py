@@ -1,34 +1,173 @@
 """
 Embedding service using sentence-transformers.
 Generates vector embeddings for text chunks.
+
+Backends (settings.EMBEDDING_BACKEND):
+  - "torch": full-precision PyTorch model (default, and the fallback)
+  - "onnx":  the same model exported to ONNX with dynamic int8 quantization,
+             run on ONNX Runtime CPU. Exported once and reused from EMBEDDING_ONNX_DIR.
+compare_backends() reports throughput and cosine agreement between the two.
+
+All encoding goes through a micro-batching scheduler (see embedding_scheduler.py):
+queries run at interactive priority, ingestion at bulk priority.
 """
 
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
 from sentence_transformers import SentenceTransformer
 from app.core.config import settings
+from app.services.embedding_scheduler import EmbeddingScheduler, INTERACTIVE, BULK
+from app.services.embedding_cache import get_query_cache
 
 # Lazy load model
 _model = None
+_scheduler = None
+_scheduler_lock = threading.Lock()
 
 
 def get_model() -> SentenceTransformer:
-    """Lazy load the embedding model."""
+    """Lazy load the embedding model with the configured backend."""
     global _model
     if _model is None:
-        print(f"📦 Loading embedding model: {settings.EMBEDDING_MODEL}")
-        _model = SentenceTransformer(settings.EMBEDDING_MODEL)
-        print("✅ Embedding model loaded.")
+        _model = load_model(settings.EMBEDDING_BACKEND)
     return _model
 
 
-def generate_embeddings(texts: list[str]) -> list[list[float]]:
-    """Generate embeddings for a list of text chunks."""
+def load_model(backend: str = "torch", fallback: bool = True) -> SentenceTransformer:
+    """
+    Load the embedding model for a backend, falling back to PyTorch if ONNX
+    fails (fallback=False re-raises instead).
+    """
+    print(f"📦 Loading embedding model: {settings.EMBEDDING_MODEL} ({backend})")
+    if backend == "onnx":
+        try:
+            model = _load_quantized_onnx_model()
+            print("✅ Embedding model loaded (ONNX Runtime, int8).")
+            return model
+        except Exception as e:
+            if not fallback:
+                raise
+            print(f"⚠️  ONNX backend unavailable ({e}); falling back to PyTorch.")
+
+    model = SentenceTransformer(settings.EMBEDDING_MODEL)
+    print("✅ Embedding model loaded.")
+    return model
+
+
+def _load_quantized_onnx_model() -> SentenceTransformer:
+    """Load the int8 ONNX export of the model, exporting + quantizing it on first use."""
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    config = settings.EMBEDDING_ONNX_QUANTIZATION
+    export_dir = Path(settings.EMBEDDING_ONNX_DIR) / settings.EMBEDDING_MODEL.replace("/", "__")
+
+    file_name = _find_quantized_export(export_dir, config)
+    if file_name is None:
+        print(f"🔧 Exporting {settings.EMBEDDING_MODEL} to quantized ONNX in {export_dir}...")
+        fp32_model = SentenceTransformer(settings.EMBEDDING_MODEL, backend="onnx")
+        fp32_model.save_pretrained(str(export_dir))
+        export_dynamic_quantized_onnx_model(fp32_model, config, str(export_dir))
+        file_name = _find_quantized_export(export_dir, config)
+        if file_name is None:
+            raise FileNotFoundError(f"No quantized ONNX export for '{config}' in {export_dir / 'onnx'}")
+
+    return SentenceTransformer(
+        str(export_dir), backend="onnx", model_kwargs={"file_name": file_name}
+    )
+
+
+def _find_quantized_export(export_dir: Path, config: str) -> Optional[str]:
+    """
+    Relative path of the quantized export for a config, or None. The exporter
+    names the file after the weights dtype (model_quint8_avx2.onnx for avx2,
+    model_qint8_<config>.onnx for the others), so match any dtype.
+    """
+    matches = sorted((export_dir / "onnx").glob(f"model_*_{config}.onnx"))
+    return f"onnx/{matches[0].name}" if matches else None
+
+
+def get_scheduler() -> EmbeddingScheduler:
+    """Get or create the shared micro-batching scheduler."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = EmbeddingScheduler(
+                    _encode_batch,
+                    max_batch_size=settings.EMBEDDING_MAX_BATCH_SIZE,
+                    max_wait_ms=settings.EMBEDDING_MAX_WAIT_MS,
+                )
+    return _scheduler
+
+
+def _encode_batch(texts: list[str]) -> np.ndarray:
+    """Run one forward pass over a scheduler batch (called on the worker thread)."""
     model = get_model()
-    embeddings = model.encode(texts, show_progress_bar=True, convert_to_numpy=True)
+    return model.encode(texts, batch_size=len(texts), convert_to_numpy=True)
+
+
+def generate_embeddings(texts: list[str]) -> list[list[float]]:
+    """Generate embeddings for a list of text chunks (bulk priority)."""
+    embeddings = get_scheduler().encode(texts, priority=BULK)
     return embeddings.tolist()
 
 
 def generate_single_embedding(text: str) -> list[float]:
-    """Generate embedding for a single text."""
-    model = get_model()
-    embedding = model.encode(text, convert_to_numpy=True)
+    """Generate embedding for a single text (interactive priority)."""
+    embedding = get_scheduler().encode([text], priority=INTERACTIVE)[0]
     return embedding.tolist()
+
+
+def embed_query(text: str) -> list[float]:
+    """Embedding for a search/chat query, served from the query cache when possible."""
+    cache = get_query_cache()
+    embedding = cache.get(text)
+    if embedding is None:
+        embedding = generate_single_embedding(text)
+        cache.put(text, embedding)
+    return embedding
+
+
+def compare_backends(texts: list[str], batch_size: int = 32, top_k: int = 10) -> dict:
+    """
+    Encode the same texts with the PyTorch and quantized ONNX backends and report
+    throughput, per-text cosine agreement, and how often each text's top-k nearest
+    neighbours in the sample agree (a proxy for retrieval quality).
+    Raises if the ONNX backend can't be loaded.
+    """
+    results = {"texts": len(texts)}
+    embeddings = {}
+
+    for backend in ("torch", "onnx"):
+        # No fallback: a failed ONNX load must not turn this into torch vs torch
+        model = load_model(backend, fallback=False)
+        model.encode(texts[:batch_size], batch_size=batch_size)  # warm-up
+        start = time.perf_counter()
+        emb = model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+        elapsed = time.perf_counter() - start
+        embeddings[backend] = emb / np.linalg.norm(emb, axis=1, keepdims=True)
+        results[backend] = {
+            "seconds": round(elapsed, 3),
+            "texts_per_second": round(len(texts) / elapsed, 1),
+        }
+
+    torch_emb, onnx_emb = embeddings["torch"], embeddings["onnx"]
+    cosine = np.sum(torch_emb * onnx_emb, axis=1)
+    results["speedup"] = round(results["onnx"]["texts_per_second"] / results["torch"]["texts_per_second"], 2)
+    results["cosine_mean"] = round(float(cosine.mean()), 4)
+    results["cosine_min"] = round(float(cosine.min()), 4)
+
+    k = min(top_k, len(texts) - 1)
+    if k > 0:
+        overlaps = []
+        torch_nn = np.argsort(-(torch_emb @ torch_emb.T), axis=1)[:, 1:k + 1]
+        onnx_nn = np.argsort(-(onnx_emb @ onnx_emb.T), axis=1)[:, 1:k + 1]
+        for a, b in zip(torch_nn, onnx_nn):
+            overlaps.append(len(set(a) & set(b)) / k)
+        results[f"neighbor_overlap@{k}"] = round(float(np.mean(overlaps)), 4)
+
+    return results
@@ -0,0 +1,200 @@
+"""
+Per-page extraction policy for PDFs.
+
+Scores a page's embedded text layer and decides how the page is extracted:
+  - "text_layer":  the text layer is usable as-is, no OCR (this includes
+                   searchable scans: one page-sized image under an invisible
+                   OCR text layer, which already is the text of the image)
+  - "ocr_regions": the text layer is usable, but image blocks cover enough of
+                   the page that they may hold text the layer lacks (scanned
+                   signatures, pasted screenshots, stamped figures)
+  - "ocr_page":    no usable text layer (scanned page, bad font encodings,
+                   garbage hidden OCR layer) → OCR the whole page
+
+Scores (all cheap, from the text layer and its layout blocks):
+  - chars:            non-whitespace characters in the text layer
+  - valid_char_ratio: share of those that are letters, digits, punctuation or
+                      common symbols (not U+FFFD, control or private-use code points)
+  - word_hit_rate:    share of alphabetic words found in a list of common
+                      English words (bad encodings map glyphs to the wrong letters).
+                      Only a tie-breaker for layers whose valid_char_ratio is
+                      already marginal: other languages, part catalogues and
+                      name rosters legitimately score low on it.
+  - image_coverage:   share of the page area covered by image blocks
+  - largest_image:    share of the page area covered by the largest one
+
+merge_region_blocks() folds the OCR'd regions of an "ocr_regions" page back
+into its text layer.
+"""
+
+import re
+import unicodedata
+
+TEXT_LAYER = "text_layer"
+OCR_REGIONS = "ocr_regions"
+OCR_PAGE = "ocr_page"
+
+# Fewer characters than this is treated as no text layer
+MIN_TEXT_CHARS = 50
+# Below this share of valid characters the layer is garbled
+MIN_VALID_CHAR_RATIO = 0.9
+# A layer with a marginal share of valid characters (below MARGINAL_VALID_CHAR_RATIO)
+# is also garbled if less than MIN_WORD_HIT_RATE of its words are common English
+# words, once there are enough words to judge
+MARGINAL_VALID_CHAR_RATIO = 0.98
+MIN_WORD_HIT_RATE = 0.05
+MIN_WORDS_TO_JUDGE = 20
+# Image blocks covering at least this share of the page are OCR'd as regions;
+# single images smaller than MIN_IMAGE_BLOCK (logos, bullets, rules) don't count
+MIN_IMAGE_COVERAGE = 0.1
+MIN_IMAGE_BLOCK = 0.02
+# An embedded image covering this much of the page is treated as the page scan
+SCAN_COVERAGE = 0.5
+# An OCR'd region line with at least this share of its area under text-layer
+# lines repeats text the layer already has, and is dropped when merging
+MAX_LINE_OVERLAP = 0.5
+
+# Unicode categories that never appear in a well-encoded text layer
+_INVALID_CATEGORIES = {"Cc", "Cf", "Co", "Cn", "Cs"}
+
+_WORD_RE = re.compile(r"[^\W\d_]{2,}")
+
+COMMON_WORDS = frozenset("""
+about above after all also an and any are as at be been before being below
+between both but by can could did do does each for from had has have he her
+here his how if in into is it its may more most no not of on one only or other
+our out over per please same she should so some such than that the their them
+then there these they this those through to total under up upon us very was we
+were what when where which while who will with within without would you your
+date name number amount due page address account invoice order payment price
+tax paid item items description quantity balance report year month day
+""".split())
+
+
+def image_regions(text_blocks: list[dict], page_area: float) -> list[dict]:
+    """Image blocks large enough to be worth OCR (at least MIN_IMAGE_BLOCK of the page)."""
+    regions = []
+    if page_area <= 0:
+        return regions
+    for block in text_blocks or []:
+        if block.get("type") != "image":
+            continue
+        x0, y0, x1, y1 = block["bbox"]
+        if max(0.0, x1 - x0) * max(0.0, y1 - y0) / page_area >= MIN_IMAGE_BLOCK:
+            regions.append(block)
+    return regions
+
+
+def score_text_layer(text: str, text_blocks: list[dict], page_area: float) -> dict:
+    """Quality scores for a page's text layer (see module docstring)."""
+    chars = [c for c in text if not c.isspace()]
+    valid = sum(
+        1 for c in chars
+        if c != "\ufffd" and unicodedata.category(c) not in _INVALID_CATEGORIES
+    )
+    words = _WORD_RE.findall(text.lower())
+    hits = sum(1 for w in words if w in COMMON_WORDS)
+
+    image_areas = [
+        (x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in (b["bbox"] for b in image_regions(text_blocks, page_area))
+    ]
+
+    return {
+        "chars": len(chars),
+        "valid_char_ratio": round(valid / len(chars), 3) if chars else 0.0,
+        "words": len(words),
+        "word_hit_rate": round(hits / len(words), 3) if words else 0.0,
+        "image_coverage": round(min(1.0, sum(image_areas) / page_area), 3) if page_area > 0 else 0.0,
+        "largest_image": round(min(1.0, max(image_areas) / page_area), 3) if image_areas else 0.0,
+    }
+
+
+def decide(scores: dict) -> dict:
+    """Pick an extraction action for a scored page. Returns {action, reason, scores}."""
+    if scores["chars"] < MIN_TEXT_CHARS:
+        action, reason = OCR_PAGE, f"no text layer ({scores['chars']} chars < {MIN_TEXT_CHARS})"
+    elif scores["valid_char_ratio"] < MIN_VALID_CHAR_RATIO:
+        action, reason = OCR_PAGE, (
+            f"garbled text layer (valid chars {scores['valid_char_ratio']} < {MIN_VALID_CHAR_RATIO})"
+        )
+    elif (scores["valid_char_ratio"] < MARGINAL_VALID_CHAR_RATIO
+          and scores["words"] >= MIN_WORDS_TO_JUDGE
+          and scores["word_hit_rate"] < MIN_WORD_HIT_RATE):
+        action, reason = OCR_PAGE, (
+            f"garbled text layer (valid chars {scores['valid_char_ratio']}, "
+            f"common words {scores['word_hit_rate']} < {MIN_WORD_HIT_RATE})"
+        )
+    elif scores["largest_image"] >= SCAN_COVERAGE:
+        # Searchable scan: the clean text layer is the OCR of that image
+        action, reason = TEXT_LAYER, (
+            f"text layer ok over a page scan ({scores['largest_image']:.0%} of the page)"
+        )
+    elif scores["image_coverage"] >= MIN_IMAGE_COVERAGE:
+        action, reason = OCR_REGIONS, (
+            f"text layer ok, images cover {scores['image_coverage']:.0%} of the page"
+        )
+    else:
+        action, reason = TEXT_LAYER, "text layer ok"
+    return {"action": action, "reason": reason, "scores": scores}
+
+
+def _area(bbox) -> float:
+    x0, y0, x1, y1 = bbox
+    return max(0.0, x1 - x0) * max(0.0, y1 - y0)
+
+
+def _overlap_share(bbox, others: list) -> float:
+    """Share of bbox's area covered by the other boxes (overlaps between them not subtracted)."""
+    area = _area(bbox)
+    if area <= 0:
+        return 0.0
+    x0, y0, x1, y1 = bbox
+    covered = sum(
+        _area((max(x0, ox0), max(y0, oy0), min(x1, ox1), min(y1, oy1)))
+        for ox0, oy0, ox1, oy1 in others
+    )
+    return min(1.0, covered / area)
+
+
+def merge_region_blocks(layout_blocks: list[dict], region_blocks: list[dict]) -> tuple[str, list[dict]]:
+    """
+    Put OCR'd region blocks in place of the image blocks they were read from,
+    so region text lands where the image sits in the page's block order.
+    OCR lines lying mostly (MAX_LINE_OVERLAP) under text-layer lines are
+    dropped: the text layer already has that text (a caption or label printed
+    over the image). Returns the rebuilt (plain_text, text_blocks).
+    """
+    layer_lines = [
+        line["bbox"] for block in layout_blocks if block["type"] == "text" for line in block["lines"]
+    ]
+
+    by_image = {}
+    for block in region_blocks:
+        lines = [line for line in block["lines"] if _overlap_share(line["bbox"], layer_lines) < MAX_LINE_OVERLAP]
+        if not lines:
+            continue
+        if len(lines) < len(block["lines"]):
+            block = {
+                **block,
+                "bbox": [
+                    min(line["bbox"][0] for line in lines), min(line["bbox"][1] for line in lines),
+                    max(line["bbox"][2] for line in lines), max(line["bbox"][3] for line in lines),
+                ],
+                "lines": lines,
+            }
+        by_image.setdefault(block["block_index"], []).append(block)
+
+    merged = []
+    for block in layout_blocks:
+        if block["type"] == "image" and block["block_index"] in by_image:
+            merged.extend(by_image[block["block_index"]])
+        else:
+            merged.append(block)
+
+    plain_text = "\n".join(line["text"] for block in merged for line in block["lines"])
+    return plain_text, merged
+
+
+def decide_page(text: str, text_blocks: list[dict], page_area: float) -> dict:
+    """Score a page's text layer and decide how to extract it."""
+    return decide(score_text_layer(text, text_blocks, page_area))
@@ -0,0 +1,386 @@
+"""
+Document ingestion pipeline.
+Runs extraction → chunking → embedding → NER → vector storage for one saved file,
+plus the summary response for files that were already ingested. The stages are
+also exposed separately so the bulk ingester can batch embedding and storage
+across documents (see cli/bulk_ingest.py).
+
+Called from background job workers (see job_queue.py), never on the event loop.
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+from app.core.config import settings
+from app.models.schemas import DocumentUploadResponse, PageExtractionDetail
+from app.services.ocr_service import extract_text_from_file, iter_pages, get_file_metadata, get_page_count
+from app.services.chunking import chunk_text_spans
+from app.services.embedding_service import generate_embeddings
+from app.services.vector_store import add_documents, add_document_chunks, delete_document
+from app.services.ner_service import extract_document_entities
+from app.services.page_cache import chunk_cache_key, get_page_chunks, put_page_chunks
+
+
+def ingest_document(
+    doc_id: str,
+    file_path: str,
+    filename: str,
+    file_hash: Optional[str] = None,
+    on_stage: Optional[Callable[[str], None]] = None,
+    on_page: Optional[Callable[[int, int], None]] = None,
+) -> DocumentUploadResponse:
+    """
+    Run the full pipeline on a saved upload:
+    1. Extract text (digital for PDFs / full OCR for images)
+    2. Chunk text to the embedding model's token budget, ending at sentences
+    3. Generate sentence-transformer embeddings
+    4. Run spaCy NER over all chunks (per-chunk entities + document summary)
+    5. Store chunks + embeddings + metadata in ChromaDB
+
+    Pages whose text was already processed in any document reuse their cached
+    chunks and embeddings (see page_cache.py). The document is recorded in the
+    registry with its file_hash so re-uploads of the same file can be recognized.
+
+    on_stage(stage) is called before each stage and on_page(done, total) after each
+    page is extracted. Either callback may raise to abort; chunks already stored
+    are removed again so a cancelled or failed document leaves nothing behind.
+    """
+    stage = on_stage or (lambda _stage: None)
+    stored = False
+
+    try:
+        # Very large PDFs are extracted, embedded and stored a batch at a time
+        if get_page_count(file_path) >= settings.STREAMING_INGEST_MIN_PAGES:
+            return ingest_document_streaming(doc_id, file_path, filename, file_hash, on_stage, on_page)
+
+        # 1-2. Extract + chunk (pages seen before reuse cached chunks + embeddings)
+        prepared = prepare_document(doc_id, file_path, filename, file_hash, on_stage, on_page)
+
+        # 3. Generate embeddings for uncached pages in one batch
+        stage("embedding")
+        embed_documents([prepared])
+
+        # 4. NER over every chunk
+        stage("ner")
+        add_chunk_entities(prepared)
+
+        # 5. Store in ChromaDB + register the document
+        stage("storing")
+        stored = True
+        stored_count = store_documents([prepared])[0]
+
+    except BaseException:
+        if stored:
+            delete_document(doc_id)
+        Path(file_path).unlink(missing_ok=True)
+        raise
+
+    return build_upload_response(prepared, stored_count)
+
+
+def ingest_document_streaming(
+    doc_id: str,
+    file_path: str,
+    filename: str,
+    file_hash: Optional[str] = None,
+    on_stage: Optional[Callable[[str], None]] = None,
+    on_page: Optional[Callable[[int, int], None]] = None,
+) -> DocumentUploadResponse:
+    """
+    Memory-bounded variant of ingest_document for very large PDFs.
+
+    Pages are pulled lazily from iter_pages() and chunked as they arrive; every
+    INGEST_BATCH_CHUNKS chunks are embedded, run through NER and stored, then
+    dropped. Only the per-page extraction summary, the text preview and the
+    entity summary are kept, so peak memory does not grow with page count.
+    The registry record is written with the last batch: the document is
+    listed once it is fully stored. Failure or cancellation rolls back every
+    batch already stored (the file itself is left for the caller to clean up).
+    """
+    stage = on_stage or (lambda _stage: None)
+    file_meta = get_file_metadata(file_path)
+    upload_date = datetime.now().isoformat()
+
+    stored = False
+    stored_count = 0
+    preview = ""
+    text_length = 0
+    extraction_details = []
+    entity_summary: dict[str, list[str]] = {}
+    seen_entities = set()
+    batch_pages, batch_results, batch_chunks = [], [], 0
+
+    def flush(final: bool):
+        nonlocal stored, stored_count, batch_pages, batch_results, batch_chunks
+        doc = {
+            "doc_id": doc_id, "filename": filename, "file_hash": file_hash,
+            "file_meta": file_meta, "upload_date": upload_date,
+            "pages": batch_pages, "page_results": batch_results,
+        }
+        stage("embedding")
+        embed_documents([doc])
+        stage("ner")
+        add_chunk_entities(doc)
+        for group in doc["entities"]:
+            for value in group["values"]:
+                if (group["label"], value) not in seen_entities:
+                    seen_entities.add((group["label"], value))
+                    entity_summary.setdefault(group["label"], []).append(value)
+
+        stage("storing")
+        record = None
+        if final:
+            record = {
+                "filename": filename,
+                "file_hash": file_hash,
+                "file_type": file_meta["file_type"],
+                "page_count": file_meta["page_count"],
+                "file_size": file_meta["file_size"],
+                "text_length": text_length,
+                "status": "processed" if stored_count + len(doc["chunks"]) else "empty",
+                "upload_date": upload_date,
+            }
+        stored = True
+        stored_count += add_document_chunks(
+            doc_id, doc["chunks"], doc["embeddings"], doc["metadatas"],
+            document=record, start_index=stored_count,
+        )
+        batch_pages, batch_results, batch_chunks = [], [], 0
+
+    try:
+        stage("extracting")
+        for page_data in iter_pages(file_path, progress_callback=on_page):
+            text = page_data["text"]
+            if text:
+                if len(preview) <= 500:
+                    preview += ("\n\n" if preview else "") + text[:501]
+                text_length += len(text) + (2 if text_length else 0)
+            extraction_details.append(_extraction_detail(page_data))
+
+            key = chunk_cache_key(text)
+            cached = get_page_chunks(key)
+            if cached is not None:
+                batch_results.append((key, *cached))
+            else:
+                page_chunks = chunk_text_spans(text)
+                batch_results.append((key, page_chunks, None))
+            # Keep only what chunk metadata needs; text and layout blocks are dropped
+            batch_pages.append({"page_number": page_data["page_number"], "method": page_data["method"]})
+            batch_chunks += len(batch_results[-1][1])
+
+            if batch_chunks >= settings.INGEST_BATCH_CHUNKS:
+                flush(final=False)
+                stage("extracting")
+        flush(final=True)
+
+    except BaseException:
+        if stored:
+            delete_document(doc_id)
+        raise
+
+    file_type_label = file_meta["file_type"].upper()
+    return DocumentUploadResponse(
+        id=doc_id,
+        filename=filename,
+        page_count=file_meta["page_count"],
+        total_chunks=stored_count,
+        status="processed",
+        extracted_text_preview=preview[:500] + "..." if len(preview) > 500 else preview,
+        entities=[{"label": k, "values": v} for k, v in entity_summary.items()],
+        extraction_details=extraction_details,
+        message=(
+            f"[{file_type_label}] Processed {file_meta['page_count']} page(s) → {stored_count} chunks "
+            f"embedded and stored (streamed in batches of {settings.INGEST_BATCH_CHUNKS})."
+        ),
+    )
+
+
+# ──────────────────────────────────────────────────────────────────
+# Pipeline stages (shared with the bulk ingester, which batches
+# embedding and storage across documents)
+# ──────────────────────────────────────────────────────────────────
+
+def prepare_document(
+    doc_id: str,
+    file_path: str,
+    filename: str,
+    file_hash: Optional[str] = None,
+    on_stage: Optional[Callable[[str], None]] = None,
+    on_page: Optional[Callable[[int, int], None]] = None,
+) -> dict:
+    """
+    Extract and chunk one file. Returns the in-progress document: its pages,
+    file metadata and per-page (cache_key, chunks, embeddings or None).
+    """
+    stage = on_stage or (lambda _stage: None)
+
+    # Extract text (auto-detects PDF vs image)
+    stage("extracting")
+    pages = extract_text_from_file(file_path, progress_callback=on_page)
+    full_text = "\n\n".join([p["text"] for p in pages if p["text"]])
+    file_meta = get_file_metadata(file_path)
+
+    # Chunk text (pages seen before reuse cached chunks + embeddings)
+    stage("chunking")
+    page_results = []  # [(cache_key, chunks, embeddings or None), ...] per page
+    for page_data in pages:
+        key = chunk_cache_key(page_data["text"])
+        cached = get_page_chunks(key)
+        if cached is not None:
+            page_results.append((key, *cached))
+        else:
+            page_chunks = chunk_text_spans(page_data["text"])
+            page_results.append((key, page_chunks, None))
+
+    return {
+        "doc_id": doc_id,
+        "filename": filename,
+        "file_hash": file_hash,
+        "pages": pages,
+        "file_meta": file_meta,
+        "full_text": full_text,
+        "page_results": page_results,
+        "upload_date": datetime.now().isoformat(),
+    }
+
+
+def embed_documents(prepared: list[dict]) -> int:
+    """
+    Embed every uncached page of the given documents in one batch and cache the
+    results per page. Returns the number of chunks embedded.
+    """
+    pending = [
+        (doc, i)
+        for doc in prepared
+        for i, (_, c, e) in enumerate(doc["page_results"]) if e is None and c
+    ]
+    pending_chunks = [chunk["text"] for doc, i in pending for chunk in doc["page_results"][i][1]]
+    new_embeddings = generate_embeddings(pending_chunks) if pending_chunks else []
+
+    offset = 0
+    for doc, i in pending:
+        key, page_chunks, _ = doc["page_results"][i]
+        page_embeddings = new_embeddings[offset:offset + len(page_chunks)]
+        offset += len(page_chunks)
+        doc["page_results"][i] = (key, page_chunks, page_embeddings)
+        put_page_chunks(key, page_chunks, page_embeddings)
+    return len(pending_chunks)
+
+
+def add_chunk_entities(doc: dict) -> None:
+    """
+    Flatten an embedded document into chunks + metadata and run NER over every
+    chunk in one streamed pass: per-chunk entities are stored with the chunk
+    (read back by search), and merged into the document summary.
+    """
+    file_meta = doc["file_meta"]
+    chunks, embeddings, chunk_metadatas = [], [], []
+    for page_data, (_, page_chunks, page_embeddings) in zip(doc["pages"], doc["page_results"]):
+        for chunk, embedding in zip(page_chunks, page_embeddings or []):
+            metadata = {
+                "document_id": doc["doc_id"],
+                "filename": doc["filename"],
+                "page_number": page_data["page_number"],
+                "page_count": file_meta["page_count"],
+                "extraction_method": page_data["method"],
+                "file_type": file_meta["file_type"],
+                "upload_date": doc["upload_date"],
+                "char_start": chunk["start"],  # Offsets into the page text
+                "char_end": chunk["end"],
+                "token_count": chunk["tokens"],
+            }
+            if doc["file_hash"]:
+                metadata["file_hash"] = doc["file_hash"]
+            chunks.append(chunk["text"])
+            embeddings.append(embedding)
+            chunk_metadatas.append(metadata)
+
+    try:
+        chunk_entities, entity_summary = extract_document_entities(chunks)
+    except Exception:
+        chunk_entities, entity_summary = [[] for _ in chunks], {}
+    for metadata, ents in zip(chunk_metadatas, chunk_entities):
+        metadata["entities"] = json.dumps(ents)
+
+    doc["chunks"] = chunks
+    doc["embeddings"] = embeddings
+    doc["metadatas"] = chunk_metadatas
+    doc["entities"] = [{"label": k, "values": v} for k, v in entity_summary.items()]
+
+
+def store_documents(prepared: list[dict]) -> list[int]:
+    """Store the chunks of several documents in one vector store write and register them."""
+    batch = []
+    for doc in prepared:
+        file_meta = doc["file_meta"]
+        batch.append({
+            "doc_id": doc["doc_id"],
+            "chunks": doc["chunks"],
+            "embeddings": doc["embeddings"],
+            "metadatas": doc["metadatas"],
+            "document": {
+                "filename": doc["filename"],
+                "file_hash": doc["file_hash"],
+                "file_type": file_meta["file_type"],
+                "page_count": file_meta["page_count"],
+                "file_size": file_meta["file_size"],
+                "text_length": len(doc["full_text"]),
+                "status": "processed" if doc["chunks"] else "empty",
+                "upload_date": doc["upload_date"],
+            },
+        })
+    return add_documents(batch)
+
+
+def build_upload_response(doc: dict, stored_count: int) -> DocumentUploadResponse:
+    """Upload response with per-page extraction details for a stored document."""
+    extraction_details = [_extraction_detail(page_data) for page_data in doc["pages"]]
+
+    file_meta = doc["file_meta"]
+    full_text = doc["full_text"]
+    file_type_label = file_meta["file_type"].upper()
+    return DocumentUploadResponse(
+        id=doc["doc_id"],
+        filename=doc["filename"],
+        page_count=file_meta["page_count"],
+        total_chunks=stored_count,
+        status="processed",
+        extracted_text_preview=full_text[:500] + "..." if len(full_text) > 500 else full_text,
+        entities=doc["entities"],
+        extraction_details=extraction_details,
+        message=f"[{file_type_label}] Processed {file_meta['page_count']} page(s) → {stored_count} chunks embedded and stored.",
+    )
+
+
+def _extraction_detail(page_data: dict) -> PageExtractionDetail:
+    text_blocks = page_data.get("text_blocks") or []
+    return PageExtractionDetail(
+        page=page_data["page_number"],
+        primary_method=page_data["method"],
+        has_digital=page_data.get("digital_text") is not None,
+        has_ocr=page_data.get("ocr_text") is not None,
+        digital_preview=(page_data.get("digital_text") or "")[:300],
+        ocr_preview=(page_data.get("ocr_text") or "")[:300],
+        block_count=len(text_blocks),
+        preprocessing_steps=page_data.get("preprocessing_steps"),
+        preprocessing_plan=page_data.get("preprocessing_plan"),
+        extraction_decision=page_data.get("extraction_decision"),
+    )
+
+
+def build_duplicate_response(existing: dict, filename: str) -> DocumentUploadResponse:
+    """Response for an upload whose content hash matches an existing document."""
+    return DocumentUploadResponse(
+        id=existing["id"],
+        filename=existing["filename"],
+        page_count=existing.get("page_count", 0),
+        total_chunks=existing.get("chunk_count", 0),
+        status="duplicate",
+        extracted_text_preview="",
+        message=(
+            f"'{filename}' has the same content as '{existing['filename']}' "
+            f"(document {existing['id']}); reusing it without re-processing."
+        ),
+    )
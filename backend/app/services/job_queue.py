@@ -0,0 +1,199 @@
+"""
+Background ingestion job queue.
+
+Uploads are saved and handed to a bounded pool of worker threads so OCR,
+embedding and NER never run on the event loop. Each job tracks its stage,
+page progress and errors, and can be cancelled between pages or stages.
+When every worker is busy and the backlog is full, new jobs are rejected.
+"""
+
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from app.core.config import settings
+from app.services.ingestion import ingest_document
+
+
+class QueueFullError(Exception):
+    """Raised when the ingestion backlog is at capacity."""
+
+
+class JobCancelledError(Exception):
+    """Raised inside a worker when its job has been cancelled."""
+
+
+FINISHED_STATUSES = {"completed", "failed", "cancelled"}
+
+_executor = None
+_jobs: dict[str, dict] = {}
+_cancel_flags: dict[str, threading.Event] = {}
+_inflight_hashes: dict[str, str] = {}  # file hash → job id of a queued/running job
+_active = 0  # queued + running jobs
+_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get or create the ingestion worker pool."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.INGEST_WORKERS, thread_name_prefix="ingest"
+        )
+    return _executor
+
+
+def _capacity() -> int:
+    return settings.INGEST_WORKERS + settings.INGEST_QUEUE_SIZE
+
+
+def has_capacity() -> bool:
+    """True if a new job would currently be accepted."""
+    with _lock:
+        return _active < _capacity()
+
+
+def _new_job(doc_id: str, filename: str, file_hash: str | None) -> dict:
+    now = datetime.now().isoformat()
+    return {
+        "job_id": uuid.uuid4().hex[:12],
+        "document_id": doc_id,
+        "filename": filename,
+        "file_hash": file_hash,
+        "status": "queued",
+        "stage": "queued",
+        "pages_done": 0,
+        "pages_total": 0,
+        "error": None,
+        "result": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def submit_job(doc_id: str, file_path: str, filename: str, file_hash: str | None = None) -> dict:
+    """
+    Queue a saved upload for ingestion. Raises QueueFullError when at capacity.
+    If a job for the same file hash is already queued or running, that job is
+    returned instead and the new file is not queued.
+    """
+    global _active
+    job = _new_job(doc_id, filename, file_hash)
+
+    with _lock:
+        existing_id = _inflight_hashes.get(file_hash) if file_hash else None
+        if existing_id is not None:
+            return dict(_jobs[existing_id])
+        if _active >= _capacity():
+            raise QueueFullError(f"Ingestion queue is full ({_capacity()} jobs in flight).")
+        _active += 1
+        _jobs[job["job_id"]] = job
+        _cancel_flags[job["job_id"]] = threading.Event()
+        if file_hash:
+            _inflight_hashes[file_hash] = job["job_id"]
+        _prune_history()
+
+    get_executor().submit(_run_job, job["job_id"], file_path)
+    return dict(job)
+
+
+def record_completed_job(doc_id: str, filename: str, result: dict, file_hash: str | None = None) -> dict:
+    """Track a job that needed no processing (e.g. a duplicate upload)."""
+    job = _new_job(doc_id, filename, file_hash)
+    job.update(status="completed", stage="done", result=result)
+    with _lock:
+        _jobs[job["job_id"]] = job
+        _prune_history()
+    return dict(job)
+
+
+def get_job(job_id: str) -> dict | None:
+    """Snapshot of a job's state, or None if unknown."""
+    with _lock:
+        job = _jobs.get(job_id)
+        return dict(job) if job else None
+
+
+def list_jobs() -> list[dict]:
+    """Snapshots of all tracked jobs, newest first."""
+    with _lock:
+        return [dict(job) for job in reversed(list(_jobs.values()))]
+
+
+def cancel_job(job_id: str) -> dict | None:
+    """
+    Request cancellation. Queued jobs never start; running jobs stop at the next
+    page or stage boundary and roll back anything already stored.
+    """
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return None
+        if job["status"] not in FINISHED_STATUSES:
+            _cancel_flags[job_id].set()
+            if job["status"] == "queued":
+                _update(job, status="cancelled", stage="cancelled")
+                if _inflight_hashes.get(job["file_hash"]) == job_id:
+                    del _inflight_hashes[job["file_hash"]]
+        return dict(job)
+
+
+def _run_job(job_id: str, file_path: str):
+    global _active
+    job = _jobs[job_id]
+    cancel_flag = _cancel_flags[job_id]
+
+    def check_cancelled():
+        if cancel_flag.is_set():
+            raise JobCancelledError()
+
+    def on_stage(stage: str):
+        check_cancelled()
+        with _lock:
+            _update(job, stage=stage)
+
+    def on_page(done: int, total: int):
+        check_cancelled()
+        with _lock:
+            _update(job, pages_done=done, pages_total=total)
+
+    try:
+        check_cancelled()
+        with _lock:
+            _update(job, status="running")
+
+        result = ingest_document(
+            job["document_id"], file_path, job["filename"], file_hash=job["file_hash"],
+            on_stage=on_stage, on_page=on_page,
+        )
+        with _lock:
+            _update(job, status="completed", stage="done", result=result.model_dump())
+
+    except JobCancelledError:
+        Path(file_path).unlink(missing_ok=True)
+        with _lock:
+            _update(job, status="cancelled", stage="cancelled")
+    except Exception as e:
+        with _lock:
+            _update(job, status="failed", error=f"Processing failed: {str(e)}")
+    finally:
+        with _lock:
+            _active -= 1
+            _cancel_flags.pop(job_id, None)
+            if _inflight_hashes.get(job["file_hash"]) == job_id:
+                del _inflight_hashes[job["file_hash"]]
+
+
+def _update(job: dict, **fields):
+    """Apply field updates to a job (caller holds _lock)."""
+    job.update(fields)
+    job["updated_at"] = datetime.now().isoformat()
+
+
+def _prune_history():
+    """Forget the oldest finished jobs beyond the history limit (caller holds _lock)."""
+    finished = [jid for jid, job in _jobs.items() if job["status"] in FINISHED_STATUSES]
+    for jid in finished[:max(0, len(finished) - settings.INGEST_JOB_HISTORY)]:
+        del _jobs[jid]
@@ -0,0 +1,293 @@
+"""
+Persistent BM25 inverted index for keyword search.
+
+Stored in SQLite next to ChromaDB and maintained incrementally:
+  - add_chunks()        → called when chunks are written to the vector store
+  - remove_document()   → called when a document is deleted
+  - search()            → only reads the postings of the query terms
+
+The meta table also holds the corpus generation, bumped by the vector store on
+every ingest/delete; cached search results are only valid for the generation
+they were computed at.
+
+The same analyzer (lowercase → strip punctuation → optional stemming) is used
+for indexing and querying, so both sides always agree on the vocabulary.
+"""
+
+import heapq
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+
+from app.core.config import settings
+
+# Word characters, keeping internal separators so IDs like "932-75-6582" stay whole
+_TOKEN_RE = re.compile(r"[^\W_]+(?:[-./'][^\W_]+)*")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    chunk_id    TEXT PRIMARY KEY,
+    document_id TEXT NOT NULL,
+    length      INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_chunks_document ON chunks(document_id);
+
+CREATE TABLE IF NOT EXISTS postings (
+    term     TEXT NOT NULL,
+    chunk_id TEXT NOT NULL,
+    tf       INTEGER NOT NULL,
+    PRIMARY KEY (term, chunk_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_postings_chunk ON postings(chunk_id);
+
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT PRIMARY KEY,
+    df   INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Singleton connection (shared across threads, serialized by _lock)
+_conn = None
+_lock = threading.RLock()
+
+
+# ──────────────────────────────────────────────────────────────────
+# Analyzer (shared by indexing and querying)
+# ──────────────────────────────────────────────────────────────────
+
+def analyzer_signature() -> str:
+    """Identifies the analyzer config; a change forces a rebuild of the index."""
+    return f"v1:stem={int(settings.KEYWORD_STEMMING)}"
+
+
+def analyze(text: str) -> list[str]:
+    """Lowercase, strip punctuation, and optionally stem a piece of text."""
+    tokens = _TOKEN_RE.findall(text.lower())
+    if settings.KEYWORD_STEMMING:
+        tokens = [_stem(t) for t in tokens]
+    return tokens
+
+
+def _stem(token: str) -> str:
+    """Light English suffix stripping (plural / -ing / -ed forms)."""
+    if len(token) <= 3 or not token.isalpha():
+        return token
+    if token.endswith("ies") and not token.endswith(("eies", "aies")):
+        return token[:-3] + "y"
+    if token.endswith("es") and not token.endswith(("aes", "ees", "oes")):
+        return token[:-1]
+    if token.endswith("s") and not token.endswith(("us", "ss")):
+        return token[:-1]
+    if token.endswith("ing") and len(token) > 5:
+        return token[:-3]
+    if token.endswith("ed") and len(token) > 4:
+        return token[:-2]
+    return token
+
+
+# ──────────────────────────────────────────────────────────────────
+# Storage
+# ──────────────────────────────────────────────────────────────────
+
+def get_connection() -> sqlite3.Connection:
+    """Get or create the SQLite connection for the index."""
+    global _conn
+    if _conn is None:
+        with _lock:
+            if _conn is None:
+                path = Path(settings.KEYWORD_INDEX_PATH)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(str(path), check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.executescript(_SCHEMA)
+                _conn = conn
+    return _conn
+
+
+def _get_meta(conn: sqlite3.Connection, key: str, default: str = "0") -> str:
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
+
+
+def _set_meta(conn: sqlite3.Connection, key: str, value) -> None:
+    conn.execute(
+        "INSERT INTO meta(key, value) VALUES (?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        (key, str(value)),
+    )
+
+
+def _adjust_totals(conn: sqlite3.Connection, chunk_delta: int, length_delta: int) -> None:
+    _set_meta(conn, "chunk_count", int(_get_meta(conn, "chunk_count")) + chunk_delta)
+    _set_meta(conn, "total_length", int(_get_meta(conn, "total_length")) + length_delta)
+
+
+def get_chunk_count() -> int:
+    """Number of chunks currently indexed."""
+    conn = get_connection()
+    with _lock:
+        return int(_get_meta(conn, "chunk_count"))
+
+
+def is_current() -> bool:
+    """True if the on-disk index was built with the current analyzer."""
+    conn = get_connection()
+    with _lock:
+        return _get_meta(conn, "analyzer", "") == analyzer_signature()
+
+
+def get_generation() -> int:
+    """Corpus generation: changes whenever chunks are added or removed."""
+    conn = get_connection()
+    with _lock:
+        return int(_get_meta(conn, "generation"))
+
+
+def bump_generation() -> int:
+    """Advance the corpus generation (invalidates cached search results)."""
+    conn = get_connection()
+    with _lock, conn:
+        generation = int(_get_meta(conn, "generation")) + 1
+        _set_meta(conn, "generation", generation)
+    return generation
+
+
+def clear() -> None:
+    """Drop every posting and reset the statistics (the generation keeps counting)."""
+    conn = get_connection()
+    with _lock, conn:
+        generation = int(_get_meta(conn, "generation")) + 1
+        conn.execute("DELETE FROM postings")
+        conn.execute("DELETE FROM terms")
+        conn.execute("DELETE FROM chunks")
+        conn.execute("DELETE FROM meta")
+        _set_meta(conn, "analyzer", analyzer_signature())
+        _set_meta(conn, "generation", generation)
+
+
+# ──────────────────────────────────────────────────────────────────
+# Incremental maintenance
+# ──────────────────────────────────────────────────────────────────
+
+def add_chunks(chunk_ids: list[str], texts: list[str], document_ids: list[str]) -> None:
+    """Index new chunks. Re-adding an existing chunk id replaces its postings."""
+    if not chunk_ids:
+        return
+
+    conn = get_connection()
+    with _lock, conn:
+        _remove_chunks(conn, chunk_ids)
+
+        chunk_rows = []
+        posting_rows = []
+        df_delta = Counter()
+        total_length = 0
+
+        for chunk_id, text, doc_id in zip(chunk_ids, texts, document_ids):
+            tokens = analyze(text)
+            counts = Counter(tokens)
+            chunk_rows.append((chunk_id, doc_id, len(tokens)))
+            posting_rows.extend((term, chunk_id, tf) for term, tf in counts.items())
+            df_delta.update(counts.keys())
+            total_length += len(tokens)
+
+        conn.executemany(
+            "INSERT INTO chunks(chunk_id, document_id, length) VALUES (?, ?, ?)", chunk_rows
+        )
+        conn.executemany(
+            "INSERT INTO postings(term, chunk_id, tf) VALUES (?, ?, ?)", posting_rows
+        )
+        conn.executemany(
+            "INSERT INTO terms(term, df) VALUES (?, ?) "
+            "ON CONFLICT(term) DO UPDATE SET df = df + excluded.df",
+            df_delta.items(),
+        )
+        _adjust_totals(conn, len(chunk_rows), total_length)
+        _set_meta(conn, "analyzer", analyzer_signature())
+
+
+def remove_document(doc_id: str) -> None:
+    """Remove every chunk of a document from the index."""
+    conn = get_connection()
+    with _lock, conn:
+        chunk_ids = [
+            row[0] for row in
+            conn.execute("SELECT chunk_id FROM chunks WHERE document_id = ?", (doc_id,))
+        ]
+        _remove_chunks(conn, chunk_ids)
+
+
+def _remove_chunks(conn: sqlite3.Connection, chunk_ids: list[str]) -> None:
+    """Delete postings for the given chunks and decrement their term stats."""
+    removed = 0
+    removed_length = 0
+
+    for chunk_id in chunk_ids:
+        row = conn.execute("SELECT length FROM chunks WHERE chunk_id = ?", (chunk_id,)).fetchone()
+        if row is None:
+            continue
+
+        terms = [r[0] for r in conn.execute(
+            "SELECT term FROM postings WHERE chunk_id = ?", (chunk_id,)
+        )]
+        conn.executemany("UPDATE terms SET df = df - 1 WHERE term = ?", [(t,) for t in terms])
+        conn.execute("DELETE FROM postings WHERE chunk_id = ?", (chunk_id,))
+        conn.execute("DELETE FROM chunks WHERE chunk_id = ?", (chunk_id,))
+        removed += 1
+        removed_length += row[0]
+
+    if removed:
+        conn.execute("DELETE FROM terms WHERE df <= 0")
+        _adjust_totals(conn, -removed, -removed_length)
+
+
+# ──────────────────────────────────────────────────────────────────
+# Query
+# ──────────────────────────────────────────────────────────────────
+
+def search(query: str, top_k: int = 10) -> list[tuple[str, float]]:
+    """
+    Score chunks with BM25 using only the postings of the query terms.
+    Returns [(chunk_id, score), ...] sorted by descending score.
+    """
+    query_terms = Counter(analyze(query))
+    if not query_terms:
+        return []
+
+    k1 = settings.BM25_K1
+    b = settings.BM25_B
+
+    conn = get_connection()
+    with _lock:
+        n_chunks = int(_get_meta(conn, "chunk_count"))
+        if n_chunks == 0:
+            return []
+        avg_len = int(_get_meta(conn, "total_length")) / n_chunks or 1.0
+
+        scores = {}
+        for term, qtf in query_terms.items():
+            row = conn.execute("SELECT df FROM terms WHERE term = ?", (term,)).fetchone()
+            if row is None:
+                continue
+            df = row[0]
+            idf = math.log(1 + (n_chunks - df + 0.5) / (df + 0.5))
+
+            postings = conn.execute(
+                "SELECT p.chunk_id, p.tf, c.length FROM postings p "
+                "JOIN chunks c ON c.chunk_id = p.chunk_id WHERE p.term = ?",
+                (term,),
+            )
+            for chunk_id, tf, length in postings:
+                norm = tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_len))
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + qtf * idf * norm
+
+    return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
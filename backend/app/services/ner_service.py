@@ -1,24 +1,40 @@
 """
 Named Entity Recognition service using spaCy.
 Identifies: PERSON, ORG, DATE, GPE (locations), MONEY, etc.
+
+Only entities are ever used, so the pipeline runs NER alone: tagger, parser,
+lemmatizer etc. are disabled (a shared tok2vec/transformer stays on only if
+NER listens to it). Ingestion streams chunk texts through nlp.pipe().
 """
 
 import spacy
 from typing import Optional
 
+from app.core.config import settings
+
+# Pipes that produce entities; everything else is disabled
+NER_PIPES = {"ner", "entity_ruler"}
+
 # Lazy load model
 _nlp = None
 
 
 def get_nlp():
-    """Lazy load spaCy model."""
+    """Lazy load the spaCy model (settings.SPACY_MODEL) with only NER enabled."""
     global _nlp
     if _nlp is None:
         try:
-            _nlp = spacy.load("en_core_web_sm")
+            nlp = spacy.load(settings.SPACY_MODEL)
         except OSError:
-            print("⚠️  spaCy model not found. Run: python -m spacy download en_core_web_sm")
+            print(f"⚠️  spaCy model not found. Run: python -m spacy download {settings.SPACY_MODEL}")
             return None
+
+        keep = set(NER_PIPES)
+        for name, pipe in nlp.pipeline:
+            if keep & set(getattr(pipe, "listening_components", [])):
+                keep.add(name)
+        nlp.select_pipes(disable=[name for name in nlp.pipe_names if name not in keep])
+        _nlp = nlp
     return _nlp
 
 
@@ -35,8 +51,44 @@ def extract_entities(text: str, max_length: int = 100000) -> list[dict]:
     if len(text) > max_length:
         text = text[:max_length]
 
-    doc = nlp(text)
+    return _doc_entities(nlp(text))
+
+
+def extract_document_entities(
+    texts: list[str],
+    max_per_text: int = 10,
+) -> tuple[list[list[dict]], dict]:
+    """
+    Ingestion NER: stream page- or chunk-sized texts through nlp.pipe() and return
+      - one entity list per text (capped at max_per_text, stored with each chunk)
+      - the document summary {label: [values]} merged across all texts
+
+    Covers the whole document; batch size and worker processes come from
+    settings.NER_BATCH_SIZE / settings.NER_N_PROCESS.
+    """
+    nlp = get_nlp()
+    if nlp is None:
+        return [[] for _ in texts], {}
+
+    per_text = []
+    summary = {}
+    seen = set()
+
+    docs = nlp.pipe(texts, batch_size=settings.NER_BATCH_SIZE, n_process=settings.NER_N_PROCESS)
+    for doc in docs:
+        entities = _doc_entities(doc)
+        per_text.append(entities[:max_per_text])
+        for ent in entities:
+            key = (ent["label"], ent["text"])
+            if key not in seen:
+                seen.add(key)
+                summary.setdefault(ent["label"], []).append(ent["text"])
 
+    return per_text, summary
+
+
+def _doc_entities(doc) -> list[dict]:
+    """Deduplicated {text, label, start, end} entities of a processed spaCy Doc."""
     entities = []
     seen = set()
 
@@ -55,21 +107,3 @@ def extract_entities(text: str, max_length: int = 100000) -> list[dict]:
         })
 
     return entities
-
-
-def extract_entities_summary(text: str) -> dict:
-    """
-    Extract entities and group them by type.
-    Returns {PERSON: [...], ORG: [...], DATE: [...], ...}
-    """
-    entities = extract_entities(text)
-    grouped = {}
-
-    for ent in entities:
-        label = ent["label"]
-        if label not in grouped:
-            grouped[label] = []
-        if ent["text"] not in grouped[label]:
-            grouped[label].append(ent["text"])
-
-    return grouped
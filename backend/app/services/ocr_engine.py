@@ -0,0 +1,207 @@
+"""
+OCR engines: run Tesseract on a preprocessed image and return its word-level
+data in pytesseract's image_to_data(output_type=DICT) layout, so the rest of
+the OCR service doesn't care which engine produced it.
+
+Engines (settings.OCR_ENGINE):
+  - "tesserocr":   a pool of initialized in-process Tesseract API handles
+                   (tesserocr bindings to the C++ API). The eng traineddata is
+                   loaded once per handle and images are passed as pixel
+                   buffers: no temp files, no subprocess per call.
+  - "pytesseract": writes the image to a temp file and runs the tesseract
+                   binary once per call (the fallback when tesserocr is not
+                   installed).
+compare_engines() reports per-image latency and text agreement between the two.
+"""
+
+import difflib
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from app.core.config import settings
+
+# image_to_data columns, in Tesseract's TSV order
+TSV_COLUMNS = (
+    "level", "page_num", "block_num", "par_num", "line_num", "word_num",
+    "left", "top", "width", "height", "conf", "text",
+)
+_INT_COLUMNS = TSV_COLUMNS[:10]
+
+OCR_LANG = "eng"
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Get or create the configured OCR engine, falling back to pytesseract."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = load_engine(settings.OCR_ENGINE)
+    return _engine
+
+
+def load_engine(name: str = "tesserocr"):
+    """Create an engine by name, falling back to pytesseract if tesserocr fails."""
+    if name == "tesserocr":
+        try:
+            engine = TesserocrEngine(pool_size=settings.OCR_ENGINE_POOL_SIZE)
+            print(f"✅ OCR engine: tesserocr (Tesseract {engine.version}, pool of {engine.pool_size})")
+            return engine
+        except Exception as e:
+            print(f"⚠️  tesserocr engine unavailable ({e}); falling back to pytesseract.")
+    return PytesseractEngine()
+
+
+def parse_tsv(tsv: str) -> dict:
+    """Tesseract TSV output → image_to_data DICT (numeric columns converted)."""
+    data = {column: [] for column in TSV_COLUMNS}
+    for row in tsv.splitlines():
+        fields = row.split("\t")
+        if len(fields) < len(TSV_COLUMNS) - 1 or not fields[0].isdigit():
+            continue  # header or malformed row
+        if len(fields) == len(TSV_COLUMNS) - 1:
+            fields.append("")  # empty text column
+        for column, value in zip(_INT_COLUMNS, fields):
+            data[column].append(int(value))
+        data["conf"].append(float(fields[10]))
+        data["text"].append(fields[11])
+    return data
+
+
+class TesserocrEngine:
+    """Pool of in-process Tesseract API handles, one image per handle at a time."""
+
+    name = "tesserocr"
+
+    def __init__(self, pool_size: int = 4, lang: str = OCR_LANG):
+        import tesserocr  # optional dependency
+
+        self._tesserocr = tesserocr
+        self.lang = lang
+        self.pool_size = max(1, pool_size)
+        self.version = tesserocr.tesseract_version().split()[1]
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        # Fail here (and fall back) rather than on the first page
+        self._idle.put(self._new_handle())
+
+    def _new_handle(self):
+        handle = self._tesserocr.PyTessBaseAPI(lang=self.lang)
+        self._created += 1
+        return handle
+
+    @contextmanager
+    def _handle(self):
+        """Borrow a handle: reuse an idle one, create one while under pool_size, else wait."""
+        try:
+            handle = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                handle = self._new_handle() if self._created < self.pool_size else None
+            if handle is None:
+                handle = self._idle.get()
+        try:
+            yield handle
+        finally:
+            handle.Clear()
+            self._idle.put(handle)
+
+    def image_to_data(self, image: np.ndarray) -> dict:
+        """OCR a grayscale (or BGR) image; the pixels are passed as a buffer."""
+        image = np.ascontiguousarray(image)
+        height, width = image.shape[:2]
+        channels = 1 if image.ndim == 2 else image.shape[2]
+        if channels == 3:
+            image = np.ascontiguousarray(image[:, :, ::-1])  # BGR → RGB
+        with self._handle() as api:
+            api.SetImageBytes(image.tobytes(), width, height, channels, width * channels)
+            api.Recognize()
+            return parse_tsv(api.GetTSVText(0))
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().End()
+            except queue.Empty:
+                break
+
+
+class PytesseractEngine:
+    """One tesseract subprocess per call (temp file in, TSV out)."""
+
+    name = "pytesseract"
+
+    def __init__(self, lang: str = OCR_LANG):
+        import pytesseract
+
+        pytesseract.pytesseract.tesseract_cmd = settings.TESSERACT_CMD
+        self._pytesseract = pytesseract
+        self.lang = lang
+        self.version = str(pytesseract.get_tesseract_version())
+        self.pool_size = 0
+
+    def image_to_data(self, image: np.ndarray) -> dict:
+        from app.services.preprocessing import cv2_to_pil
+
+        pil_image = cv2_to_pil(image) if isinstance(image, np.ndarray) else image
+        return self._pytesseract.image_to_data(
+            pil_image, lang=self.lang, output_type=self._pytesseract.Output.DICT
+        )
+
+    def close(self):
+        pass
+
+
+def _words(data: dict) -> list[str]:
+    return [word for word, conf in zip(data["text"], data["conf"]) if word.strip() and float(conf) >= 0]
+
+
+def compare_engines(images: list[np.ndarray], repeats: int = 1) -> dict:
+    """
+    OCR the same images with both engines and report per-image latency
+    (mean / p50 / p95 ms, after one warm-up call) and how closely the
+    recognized words agree (difflib ratio over the word sequences).
+    """
+    results = {"images": len(images), "repeats": repeats}
+    words = {}
+
+    for name in ("pytesseract", "tesserocr"):
+        engine = TesserocrEngine(pool_size=1) if name == "tesserocr" else PytesseractEngine()
+        try:
+            engine.image_to_data(images[0])  # warm-up
+            latencies, page_words = [], []
+            for repeat in range(repeats):
+                for image in images:
+                    start = time.perf_counter()
+                    data = engine.image_to_data(image)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    if repeat == 0:
+                        page_words.append(_words(data))
+            words[name] = page_words
+        finally:
+            engine.close()
+
+        ms = np.array(latencies)
+        results[name] = {
+            "version": engine.version,
+            "mean_ms": round(float(ms.mean()), 1),
+            "p50_ms": round(float(np.percentile(ms, 50)), 1),
+            "p95_ms": round(float(np.percentile(ms, 95)), 1),
+            "images_per_second": round(1000 / float(ms.mean()), 2),
+        }
+
+    results["speedup"] = round(results["pytesseract"]["mean_ms"] / results["tesserocr"]["mean_ms"], 2)
+    ratios = [
+        difflib.SequenceMatcher(None, a, b, autojunk=False).ratio()
+        for a, b in zip(words["pytesseract"], words["tesserocr"])
+    ]
+    results["word_agreement"] = round(float(np.mean(ratios)), 4)
+    return results
@@ -3,30 +3,44 @@ OCR service: Extracts text from documents (PDFs and images).
 
 Supports two input types:
   - PDF files  → PyMuPDF digital extraction + OCR fallback
-  - Image files (.jpg, .png, .tiff, .bmp) → Full OCR pipeline (always)
+  - Image files (.jpg, .png, .tiff, .bmp) → Full OCR pipeline (always),
+    one page per frame for multi-page TIFFs
 
 OCR Pipeline (for images and scanned PDFs):
   1. Load image
-  2. OpenCV preprocessing (grayscale → denoise → CLAHE → deskew → binarize)
-  3. Tesseract OCR with layout-aware extraction
-  4. Return text + preprocessing step thumbnails for visualization
-
-For digital PDFs: PyMuPDF get_text("dict") preserves layout blocks with bounding boxes.
-OCR is also run on the first N pages of digital PDFs for demo comparison purposes.
+  2. OpenCV preprocessing, adaptive per page (grayscale, then only the needed
+     stages of denoise → CLAHE → deskew → binarize for the selected profile)
+  3. One Tesseract image_to_data pass → plain text + layout blocks
+     (pooled in-process engine or the pytesseract fallback; see ocr_engine.py)
+  4. Return text (+ preprocessing stage artifact URLs in debug mode)
+
+For PDFs: PyMuPDF get_text("dict") preserves layout blocks with bounding boxes,
+and a per-page policy (see extraction_policy.py) scores the text layer to decide
+whether the page needs OCR: none, only its image blocks (each rendered through
+a page clip, its text merged into the page in block order), or the whole page.
+Comparison OCR of digital pages is opt-in (settings.OCR_COMPARISON_PAGES).
 """
 
 import fitz  # PyMuPDF
-import pytesseract
+import multiprocessing
+import threading
+import time
 import numpy as np
 import cv2
-import base64
-import io
 from PIL import Image
 from pathlib import Path
+from typing import Callable, Iterator, Optional
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
+from app.core.config import settings
+from app.services.ocr_engine import get_engine
+from app.services.extraction_policy import (
+    TEXT_LAYER, OCR_REGIONS, OCR_PAGE, SCAN_COVERAGE, decide_page, image_regions, merge_region_blocks,
+)
+from app.services.artifact_store import artifacts_enabled, save_image, artifact_url
+from app.services.page_cache import get_page_ocr, put_page_ocr, hash_bytes
 from app.services.preprocessing import (
-    preprocess_image, pil_to_cv2, cv2_to_pil,
-    to_grayscale, denoise, enhance_contrast, deskew, binarize,
+    pil_to_cv2, to_grayscale, plan_preprocessing, run_plan, estimate_glyph_height,
 )
 
 
@@ -35,8 +49,21 @@ IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".tiff", ".tif", ".bmp", ".webp"}
 PDF_EXTENSIONS = {".pdf"}
 SUPPORTED_EXTENSIONS = IMAGE_EXTENSIONS | PDF_EXTENSIONS
 
-# How many pages to force-OCR even on digital PDFs (for demo purposes)
-DEMO_OCR_PAGES = 3
+# Resolution of the render hashed to identify a page for the OCR cache; the
+# same render is the probe that picks the page's OCR DPI
+PAGE_HASH_DPI = 72
+
+# Probe glyphs smaller than this (pixels at PAGE_HASH_DPI) can't be measured
+# reliably: the page is treated as small print and rendered at OCR_DPI_MAX
+MIN_PROBE_GLYPH_PX = 6
+
+# Shared process pool for page OCR (created on first use)
+_ocr_pools: dict[int, ProcessPoolExecutor] = {}  # worker count → pool
+_ocr_pool_lock = threading.Lock()
+
+# Per-worker-process cache of the PDF / image being OCR'd, so pages (frames) don't reopen it
+_worker_doc = None
+_worker_image = None
 
 
 def is_image_file(file_path: str) -> bool:
@@ -55,25 +82,50 @@ def is_supported_file(file_path: str) -> bool:
 # Main entry point: handles both PDFs and images
 # ──────────────────────────────────────────────────────────────────
 
-def extract_text_from_file(file_path: str) -> list[dict]:
+def extract_text_from_file(
+    file_path: str,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+) -> list[dict]:
     """
     Extract text from any supported file (PDF or image).
     Dispatches to the appropriate handler.
+    progress_callback(pages_done, pages_total) is called after each page.
 
-    Returns list of page dicts (images always return 1 page):
+    Returns list of page dicts (one per PDF page or image frame):
       {
         page_number, text, method, ocr_text, digital_text,
-        text_blocks, preprocessing_steps
+        text_blocks, preprocessing_steps, preprocessing_plan, extraction_decision
       }
     """
+    return list(iter_pages(file_path, progress_callback=progress_callback))
+
+
+def iter_pages(
+    file_path: str,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+) -> Iterator[dict]:
+    """
+    Lazily yield the page dicts of any supported file, in page order.
+    PDFs are extracted PDF_PAGE_WINDOW pages at a time, and image frames
+    (multi-page TIFFs) are decoded one at a time, so memory stays bounded
+    however long the document is.
+    """
     if is_image_file(file_path):
-        return extract_text_from_image(file_path)
+        yield from iter_image_pages(file_path, progress_callback=progress_callback)
     elif is_pdf_file(file_path):
-        return extract_text_from_pdf(file_path)
+        yield from iter_pdf_pages(file_path, progress_callback=progress_callback)
     else:
         raise ValueError(f"Unsupported file type: {Path(file_path).suffix}")
 
 
+def get_page_count(file_path: str) -> int:
+    """Number of pages without extracting anything (image frames count as pages)."""
+    if is_pdf_file(file_path):
+        with fitz.open(file_path) as doc:
+            return len(doc)
+    return get_image_frame_count(file_path)
+
+
 # ──────────────────────────────────────────────────────────────────
 # Image extraction (JPG, PNG, TIFF, etc.)
 # ──────────────────────────────────────────────────────────────────
@@ -82,84 +134,187 @@ def extract_text_from_image(image_path: str) -> list[dict]:
     """
     Extract text from an image file using the full OCR pipeline.
     Always runs: load → preprocess → Tesseract OCR.
-    Also extracts layout blocks via Tesseract's bounding box data.
+    Layout blocks come from the same Tesseract pass as the text.
 
-    Returns a single-element list (one "page") for consistency with PDF output.
+    Returns one page per image frame (multi-page TIFFs have several; other
+    images one), in the same shape as PDF output.
     """
-    # Load image
-    img = Image.open(image_path).convert("RGB")
-    cv2_img = pil_to_cv2(img)
-
-    # Run OCR with preprocessing steps
-    ocr_text, preprocessing_steps = ocr_image_with_steps(cv2_img)
+    return list(iter_image_pages(image_path))
 
-    # Extract layout blocks via Tesseract's bounding box output
-    text_blocks = extract_layout_from_image(cv2_img)
 
-    return [{
-        "page_number": 1,
+def iter_image_pages(
+    image_path: str,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    ocr_workers: Optional[int] = None,
+    window: Optional[int] = None,
+) -> Iterator[dict]:
+    """
+    Lazily yield one page dict per image frame, in frame order. Frames are
+    decoded one at a time (seek), so memory holds one frame per worker; with
+    ocr_workers > 1 (defaults to settings.OCR_WORKERS) each window of frames
+    is OCR'd on the process pool, like scanned PDF pages.
+    """
+    if ocr_workers is None:
+        ocr_workers = settings.OCR_WORKERS
+    window = max(1, window or settings.PDF_PAGE_WINDOW)
+    total = get_image_frame_count(image_path)
+
+    if ocr_workers > 1 and total > 1:
+        pool = get_ocr_pool(ocr_workers)
+        for start in range(0, total, window):
+            frames = range(start, min(start + window, total))
+            futures = {pool.submit(_ocr_image_frame_task, image_path, i): i for i in frames}
+            results = {}
+            try:
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+                    if progress_callback:
+                        progress_callback(start + len(results), total)
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+            for i in frames:
+                yield _image_page(i, results.pop(i))
+        return
+
+    with Image.open(image_path) as img:
+        for i in range(total):
+            img.seek(i)
+            result = ocr_image_with_steps(_frame_to_array(img))
+            if progress_callback:
+                progress_callback(i + 1, total)
+            yield _image_page(i, result)
+
+
+def get_image_frame_count(image_path: str) -> int:
+    """Frames in an image file (multi-page TIFF pages; 1 for other images)."""
+    with Image.open(image_path) as img:
+        return getattr(img, "n_frames", 1)
+
+
+def _frame_to_array(img: Image.Image) -> np.ndarray:
+    """The current frame as a CV2 image: grayscale for bilevel/gray frames (fax, scans), else BGR."""
+    if img.mode in ("1", "L"):
+        return np.asarray(img.convert("L"))
+    return pil_to_cv2(img.convert("RGB"))
+
+
+def _ocr_image_frame_task(image_path: str, frame_index: int) -> tuple[str, list[dict], Optional[dict], dict]:
+    """Process-pool entry point: decode one image frame in the worker and OCR it."""
+    global _worker_image
+    if _worker_image is None or _worker_image.filename != image_path:
+        if _worker_image is not None:
+            _worker_image.close()
+        _worker_image = Image.open(image_path)
+    _worker_image.seek(frame_index)
+    return ocr_image_with_steps(_frame_to_array(_worker_image))
+
+
+def _image_page(frame_index: int, result: tuple) -> dict:
+    ocr_text, text_blocks, preprocessing_steps, plan = result
+    return {
+        "page_number": frame_index + 1,
         "text": ocr_text,
         "method": "ocr",
         "ocr_text": ocr_text,
         "digital_text": None,
         "text_blocks": text_blocks,
         "preprocessing_steps": preprocessing_steps,
-    }]
+        "preprocessing_plan": plan,
+        "extraction_decision": {"action": OCR_PAGE, "reason": "image file", "scores": None},
+    }
 
 
-def extract_layout_from_image(cv2_img: np.ndarray) -> list[dict]:
-    """
-    Extract layout blocks from an image using Tesseract's bounding box data.
-    Groups text by block_num to preserve spatial layout.
+def parse_tesseract_data(data: dict, min_block_conf: float = 30) -> tuple[str, list[dict]]:
     """
-    # Preprocess for better Tesseract results
-    processed = preprocess_image(cv2_img.copy())
-    processed_pil = cv2_to_pil(processed)
+    Turn Tesseract image_to_data output into (plain_text, text_blocks).
 
-    try:
-        data = pytesseract.image_to_data(
-            processed_pil, lang="eng", output_type=pytesseract.Output.DICT
-        )
-    except Exception:
-        return []
+    Text is rebuilt in reading order from block / paragraph / line numbers
+    (lines joined by newlines, paragraphs and blocks by blank lines).
+    Layout blocks group confident words (conf >= min_block_conf) by block_num
+    with one entry per line.
+    """
+    paragraphs = []   # [(par_key, [line_key, ...]), ...] in reading order
+    line_words = {}   # (block, par, line) → [words]
+    blocks_map = {}   # block_num → {"lines": {(par, line): {...}}, bbox}
 
-    # Group words by block number
-    blocks_map = {}
     n = len(data["text"])
     for i in range(n):
-        text = data["text"][i].strip()
-        conf = int(data["conf"][i]) if data["conf"][i] != "-1" else -1
-        if not text or conf < 30:
+        text = str(data["text"][i]).strip()
+        conf = float(data["conf"][i])
+        if not text or conf < 0:
             continue
 
         block_num = data["block_num"][i]
-        if block_num not in blocks_map:
-            blocks_map[block_num] = {
-                "words": [],
-                "x0": data["left"][i],
-                "y0": data["top"][i],
-                "x1": data["left"][i] + data["width"][i],
-                "y1": data["top"][i] + data["height"][i],
-            }
-
-        block = blocks_map[block_num]
-        block["words"].append(text)
-        block["x0"] = min(block["x0"], data["left"][i])
-        block["y0"] = min(block["y0"], data["top"][i])
-        block["x1"] = max(block["x1"], data["left"][i] + data["width"][i])
-        block["y1"] = max(block["y1"], data["top"][i] + data["height"][i])
+        par_key = (block_num, data["par_num"][i])
+        line_key = par_key + (data["line_num"][i],)
+
+        # Plain text keeps every recognized word, like image_to_string
+        if line_key not in line_words:
+            line_words[line_key] = []
+            if not paragraphs or paragraphs[-1][0] != par_key:
+                paragraphs.append((par_key, []))
+            paragraphs[-1][1].append(line_key)
+        line_words[line_key].append(text)
+
+        if conf < min_block_conf:
+            continue
+
+        x0, y0 = data["left"][i], data["top"][i]
+        x1, y1 = x0 + data["width"][i], y0 + data["height"][i]
+
+        block = blocks_map.setdefault(block_num, {"lines": {}, "bbox": [x0, y0, x1, y1]})
+        _extend_bbox(block["bbox"], x0, y0, x1, y1)
+
+        line = block["lines"].setdefault(line_key, {"words": [], "bbox": [x0, y0, x1, y1]})
+        line["words"].append(text)
+        _extend_bbox(line["bbox"], x0, y0, x1, y1)
+
+    plain_text = "\n\n".join(
+        "\n".join(" ".join(line_words[key]) for key in line_keys)
+        for _, line_keys in paragraphs
+    )
 
     text_blocks = []
     for block_num, block in sorted(blocks_map.items()):
-        block_text = " ".join(block["words"])
-        if block_text.strip():
-            text_blocks.append({
-                "block_index": block_num,
-                "type": "text",
-                "bbox": [block["x0"], block["y0"], block["x1"], block["y1"]],
-                "lines": [{"text": block_text, "bbox": [block["x0"], block["y0"], block["x1"], block["y1"]], "font_size": 0}],
-            })
+        lines = [
+            {"text": " ".join(line["words"]), "bbox": line["bbox"], "font_size": 0}
+            for line in block["lines"].values()
+        ]
+        text_blocks.append({
+            "block_index": block_num,
+            "type": "text",
+            "bbox": block["bbox"],
+            "lines": lines,
+        })
+
+    return plain_text.strip(), text_blocks
+
+
+def _extend_bbox(bbox: list, x0, y0, x1, y1):
+    bbox[0] = min(bbox[0], x0)
+    bbox[1] = min(bbox[1], y0)
+    bbox[2] = max(bbox[2], x1)
+    bbox[3] = max(bbox[3], y1)
+
 
+def _scale_blocks(text_blocks: list[dict], factor: float, offset: tuple[float, float] = (0, 0)) -> list[dict]:
+    """
+    Scale pixel bounding boxes (e.g. rendered page pixels → PDF points), then
+    shift them by offset (the origin of a clipped render, in points).
+    """
+    dx, dy = offset
+
+    def convert(bbox):
+        x0, y0, x1, y1 = bbox
+        return [round(x0 * factor + dx, 1), round(y0 * factor + dy, 1),
+                round(x1 * factor + dx, 1), round(y1 * factor + dy, 1)]
+
+    for block in text_blocks:
+        block["bbox"] = convert(block["bbox"])
+        for line in block["lines"]:
+            line["bbox"] = convert(line["bbox"])
     return text_blocks
 
 
@@ -167,59 +322,307 @@ def extract_layout_from_image(cv2_img: np.ndarray) -> list[dict]:
 # PDF extraction
 # ──────────────────────────────────────────────────────────────────
 
-def extract_text_from_pdf(pdf_path: str, force_ocr_pages: int = DEMO_OCR_PAGES) -> list[dict]:
+def extract_text_from_pdf(
+    pdf_path: str,
+    force_ocr_pages: Optional[int] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    ocr_workers: Optional[int] = None,
+) -> list[dict]:
     """
     Extract text from PDF, page by page.
 
-    Digital PDFs: PyMuPDF text + layout blocks. OCR also run on first N pages for demo.
-    Scanned PDFs: Full OCR pipeline as primary extraction.
+    Pages with a usable text layer: PyMuPDF text + layout blocks.
+    Scanned pages or garbled text layers: Full OCR pipeline as primary extraction.
+    force_ocr_pages: also OCR the first N text-layer pages for comparison
+    (defaults to settings.OCR_COMPARISON_PAGES).
+
+    ocr_workers > 1 fans page OCR out to a process pool (defaults to settings.OCR_WORKERS).
+    Page order and the page-dict shape are the same either way.
     """
-    doc = fitz.open(pdf_path)
-    pages = []
+    return list(iter_pdf_pages(pdf_path, force_ocr_pages, progress_callback, ocr_workers))
 
-    for page_num in range(len(doc)):
-        page = doc[page_num]
 
-        # Step 1: Try digital extraction with layout
-        digital_text, text_blocks = extract_page_with_layout(page)
-        has_text_layer = len(digital_text) > 50
+def iter_pdf_pages(
+    pdf_path: str,
+    force_ocr_pages: Optional[int] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    ocr_workers: Optional[int] = None,
+    window: Optional[int] = None,
+) -> Iterator[dict]:
+    """
+    Generator form of extract_text_from_pdf: pages are extracted (and OCR'd,
+    in parallel within a window) `window` pages at a time and yielded in order.
+    window defaults to settings.PDF_PAGE_WINDOW.
+    """
+    if ocr_workers is None:
+        ocr_workers = settings.OCR_WORKERS
+    if force_ocr_pages is None:
+        force_ocr_pages = settings.OCR_COMPARISON_PAGES
+    window = max(1, window or settings.PDF_PAGE_WINDOW)
 
-        # Step 2: Decide whether to run OCR
-        should_ocr = (not has_text_layer) or (page_num < force_ocr_pages)
+    doc = fitz.open(pdf_path)
+    try:
+        total = len(doc)
+        done = 0
+        for start in range(0, total, window):
+            page_indices = range(start, min(start + window, total))
+            pages = _extract_pdf_pages(
+                doc, pdf_path, page_indices, force_ocr_pages, progress_callback, ocr_workers, done, total,
+            )
+            done += len(pages)
+            yield from pages
+    finally:
+        doc.close()
 
-        ocr_text = None
-        preprocessing_steps = None
-        if should_ocr:
-            ocr_text, preprocessing_steps = ocr_pdf_page_with_steps(page)
 
-        # Step 3: Pick primary text
-        if has_text_layer:
-            primary_text = digital_text
-            method = "digital"
-        else:
-            primary_text = ocr_text or ""
-            method = "ocr"
+def _extract_pdf_pages(
+    doc: fitz.Document,
+    pdf_path: str,
+    page_indices: range,
+    force_ocr_pages: int,
+    progress_callback: Optional[Callable[[int, int], None]],
+    ocr_workers: int,
+    done: int,
+    total: int,
+) -> list[dict]:
+    """Extract one window of pages; done/total are the document-wide progress so far."""
+    pages = {}
+    ocr_indices = []
+    regions = {}  # page index → image blocks to OCR (pages OCR'd by region only)
+
+    # Step 1: Digital extraction with layout + policy decision on which pages need OCR
+    filename = Path(pdf_path).name
+    for page_num in page_indices:
+        page = doc[page_num]
+        digital_text, text_blocks = extract_page_with_layout(page)
+        decision = decide_page(digital_text, text_blocks, abs(page.rect))
+        action = decision["action"]
+        use_text_layer = action != OCR_PAGE
+        if action != TEXT_LAYER:
+            print(f"🧭 {filename} p{page_num + 1}: {action} ({decision['reason']})")
 
-        pages.append({
+        pages[page_num] = {
             "page_number": page_num + 1,
-            "text": primary_text,
-            "method": method,
+            "text": digital_text if use_text_layer else "",
+            "method": {TEXT_LAYER: "digital", OCR_REGIONS: "mixed"}.get(action, "ocr"),
+            "ocr_text": None,
+            "digital_text": digital_text or None,
+            "text_blocks": text_blocks if use_text_layer else None,
+            "preprocessing_steps": None,
+            "preprocessing_plan": None,
+            "extraction_decision": decision,
+        }
+
+        if action == OCR_REGIONS:
+            # Only the image blocks are rendered and OCR'd
+            regions[page_num] = [
+                {"block_index": b["block_index"], "bbox": b["bbox"]}
+                for b in image_regions(text_blocks, abs(page.rect))
+            ]
+            ocr_indices.append(page_num)
+        elif action == OCR_PAGE or page_num < force_ocr_pages:
+            ocr_indices.append(page_num)
+
+    # Step 2: Reuse OCR for pages already seen in any document (page cache)
+    ocr_results = {}
+    cache_keys = {}
+    renders = {}
+    for page_num in ocr_indices:
+        cache_keys[page_num], renders[page_num] = _probe_page(doc[page_num])
+        if page_num in regions:
+            cache_keys[page_num] = hash_bytes(f"{cache_keys[page_num]}|regions".encode("utf-8"))
+        cached = get_page_ocr(cache_keys[page_num])
+        if cached is not None:
+            ocr_results[page_num] = (
+                cached["ocr_text"], cached["text_blocks"],
+                cached["preprocessing_steps"], cached.get("preprocessing_plan"),
+            )
+    to_ocr = [i for i in ocr_indices if i not in ocr_results]
+
+    done += len(pages) - len(to_ocr)
+    if progress_callback and len(pages) > len(to_ocr):
+        progress_callback(done, total)
+
+    # Step 3: OCR the remaining pages (in-process or on the process pool)
+    if ocr_workers > 1 and len(to_ocr) > 1:
+        fresh = _ocr_pdf_pages_parallel(
+            pdf_path, to_ocr, renders, regions, ocr_workers, done, total, progress_callback,
+        )
+    else:
+        fresh = {}
+        for page_num in to_ocr:
+            if page_num in regions:
+                fresh[page_num] = ocr_pdf_regions(doc[page_num], regions[page_num], render=renders[page_num])
+            else:
+                fresh[page_num] = ocr_pdf_page_with_steps(doc[page_num], render=renders[page_num])
+            done += 1
+            if progress_callback:
+                progress_callback(done, total)
+
+    for page_num, (ocr_text, ocr_blocks, preprocessing_steps, plan) in fresh.items():
+        put_page_ocr(cache_keys[page_num], {
             "ocr_text": ocr_text,
-            "digital_text": digital_text if has_text_layer else None,
-            "text_blocks": text_blocks if has_text_layer else None,
+            "text_blocks": ocr_blocks,
             "preprocessing_steps": preprocessing_steps,
+            "preprocessing_plan": plan,
         })
+    ocr_results.update(fresh)
+
+    # Step 4: Pick primary text (scanned pages take their layout from OCR,
+    # mixed pages get their image-region text merged into the text layer)
+    for page_num, (ocr_text, ocr_blocks, preprocessing_steps, plan) in ocr_results.items():
+        page_data = pages[page_num]
+        page_data["ocr_text"] = ocr_text
+        page_data["preprocessing_steps"] = preprocessing_steps
+        page_data["preprocessing_plan"] = plan
+        if page_data["method"] == "ocr":
+            page_data["text"] = ocr_text or ""
+            page_data["text_blocks"] = ocr_blocks
+        elif page_data["method"] == "mixed":
+            page_data["text"], page_data["text_blocks"] = merge_region_blocks(
+                page_data["text_blocks"], ocr_blocks
+            )
+
+    return [pages[page_num] for page_num in page_indices]
+
+
+def _ocr_pdf_pages_parallel(
+    pdf_path: str,
+    page_indices: list[int],
+    renders: dict[int, dict],
+    regions: dict[int, list[dict]],
+    ocr_workers: int,
+    done: int,
+    total: int,
+    progress_callback: Optional[Callable[[int, int], None]],
+) -> dict[int, tuple[str, list[dict], Optional[dict], dict]]:
+    """
+    OCR pages (or just their image regions) on the process pool. Workers get
+    (path, page index, DPI, regions), never pixmaps.
+    """
+    pool = get_ocr_pool(ocr_workers)
+    futures = {
+        pool.submit(_ocr_pdf_page_task, pdf_path, i, renders[i], regions.get(i)): i
+        for i in page_indices
+    }
 
-    doc.close()
-    return pages
+    results = {}
+    try:
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+            done += 1
+            if progress_callback:
+                progress_callback(done, total)
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+
+    return results
+
+
+def _probe_page(page: fitz.Page) -> tuple[str, dict]:
+    """
+    One cheap low-DPI grayscale render of a page, used twice: its hash (plus
+    the settings that shape OCR output) is the page-cache key for OCR output,
+    and its glyph sizes pick the DPI the page is OCR'd at (see choose_ocr_dpi).
+    """
+    pix = page.get_pixmap(dpi=PAGE_HASH_DPI, colorspace=fitz.csGRAY, alpha=False)
+    fingerprint = (
+        f"ocr-v3|artifacts={settings.PREPROCESSING_ARTIFACTS}"
+        f"|profile={settings.PREPROCESSING_PROFILE}|engine={settings.OCR_ENGINE}"
+        f"|dpi={settings.OCR_DPI_MIN}-{settings.OCR_DPI_MAX}/{settings.OCR_TARGET_GLYPH_PX}"
+    )
+    cache_key = hash_bytes(pix.samples + fingerprint.encode("utf-8"))
+    return cache_key, choose_ocr_dpi(page, probe=_pixmap_array(pix))
+
+
+def choose_ocr_dpi(page: fitz.Page, probe: Optional[np.ndarray] = None) -> dict:
+    """
+    OCR render resolution for a page, so glyphs come out about
+    OCR_TARGET_GLYPH_PX tall: large print is not oversampled, small print
+    gets OCR_DPI_MAX. The glyph height is measured on a PAGE_HASH_DPI probe
+    render; when the probe finds no text, a full-page scan image is rendered
+    at its native resolution (more pixels would only be interpolated).
+    Returns {"dpi", "source", "probe_glyph_px"}.
+    """
+    if probe is None:
+        pix = page.get_pixmap(dpi=PAGE_HASH_DPI, colorspace=fitz.csGRAY, alpha=False)
+        probe = _pixmap_array(pix)
+    glyph_px = estimate_glyph_height(probe)
+
+    if glyph_px is not None and glyph_px >= MIN_PROBE_GLYPH_PX:
+        dpi, source = settings.OCR_TARGET_GLYPH_PX / glyph_px * PAGE_HASH_DPI, "glyph_height"
+    elif glyph_px is not None:
+        dpi, source = settings.OCR_DPI_MAX, "small_print"
+    else:
+        native = _scan_image_dpi(page)
+        dpi, source = (native, "scan_resolution") if native else (settings.OCR_DPI_MAX, "default")
+
+    dpi = int(min(max(dpi, settings.OCR_DPI_MIN), settings.OCR_DPI_MAX))
+    return {"dpi": dpi, "source": source, "probe_glyph_px": glyph_px}
+
+
+def _scan_image_dpi(page: fitz.Page) -> Optional[float]:
+    """Native resolution of an embedded image covering most of the page, if any."""
+    page_area = abs(page.rect)
+    for info in page.get_image_info():
+        bbox = fitz.Rect(info["bbox"])
+        if bbox.is_empty or not page_area or abs(bbox) / page_area < SCAN_COVERAGE:
+            continue
+        return max(info["width"] / bbox.width, info["height"] / bbox.height) * 72
+    return None
+
+
+def _pixmap_array(pix: fitz.Pixmap) -> np.ndarray:
+    """
+    Read-only (height, width) uint8 view of a grayscale pixmap's samples, no
+    copy. The view is only valid while pix is alive: keep a reference to it.
+    """
+    return np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.width)
+
+
+def get_ocr_pool(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Get or create the shared page-OCR process pool with `workers` processes
+    (defaults to settings.OCR_WORKERS). One pool is kept per worker count.
+    """
+    workers = max(1, workers or settings.OCR_WORKERS)
+    pool = _ocr_pools.get(workers)
+    if pool is None:
+        with _ocr_pool_lock:
+            pool = _ocr_pools.get(workers)
+            if pool is None:
+                # spawn: forking a threaded server process is not safe
+                pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                _ocr_pools[workers] = pool
+    return pool
+
+
+def _ocr_pdf_page_task(
+    pdf_path: str, page_index: int, render: Optional[dict] = None, regions: Optional[list[dict]] = None,
+) -> tuple[str, list[dict], Optional[dict], dict]:
+    """Process-pool entry point: open the PDF in the worker and OCR one page (or its regions)."""
+    global _worker_doc
+    if _worker_doc is None or _worker_doc.name != pdf_path:
+        if _worker_doc is not None:
+            _worker_doc.close()
+        _worker_doc = fitz.open(pdf_path)
+    if regions:
+        return ocr_pdf_regions(_worker_doc[page_index], regions, render=render)
+    return ocr_pdf_page_with_steps(_worker_doc[page_index], render=render)
 
 
 def extract_page_with_layout(page: fitz.Page) -> tuple[str, list[dict]]:
     """
     Extract text from a PDF page preserving layout structure.
-    Uses PyMuPDF's dict extraction for text blocks with bounding boxes.
+    Uses PyMuPDF's dict extraction for text and image blocks with bounding
+    boxes (image blocks are only listed with TEXT_PRESERVE_IMAGES).
     """
-    page_dict = page.get_text("dict", flags=fitz.TEXT_PRESERVE_WHITESPACE)
+    page_dict = page.get_text("dict", flags=fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_PRESERVE_IMAGES)
     blocks = page_dict.get("blocks", [])
 
     text_blocks = []
@@ -271,59 +674,136 @@ def extract_page_with_layout(page: fitz.Page) -> tuple[str, list[dict]]:
 # OCR with preprocessing step capture
 # ──────────────────────────────────────────────────────────────────
 
-def ocr_image_with_steps(cv2_img: np.ndarray) -> tuple[str, dict]:
+def ocr_image_with_steps(
+    cv2_img: np.ndarray, capture_steps: bool = True,
+) -> tuple[str, list[dict], Optional[dict], dict]:
     """
-    Run OCR on a CV2 image with full preprocessing pipeline.
-    Returns (ocr_text, preprocessing_steps_as_base64_thumbnails).
+    Run OCR on a CV2 image (BGR, or already grayscale) with adaptive preprocessing: the planner measures the
+    page and only the stages it needs are run (see preprocessing.plan_preprocessing).
+    Preprocessing and Tesseract each run exactly once; text and layout are
+    both derived from the single image_to_data result.
+
+    Stage images are only produced in artifact "store" mode, where they are
+    saved to the content-addressed artifact store and returned as URLs.
+    capture_steps=False skips them regardless (e.g. for small page regions).
+    Returns (ocr_text, text_blocks, preprocessing_steps or None, preprocessing_plan).
     """
-    steps = {}
-    steps["original"] = _img_to_base64_thumb(cv2_img, max_width=400)
-
-    gray = to_grayscale(cv2_img)
-    steps["grayscale"] = _img_to_base64_thumb(gray, max_width=400)
-
-    denoised_img = denoise(gray)
-    steps["denoised"] = _img_to_base64_thumb(denoised_img, max_width=400)
+    steps = {} if capture_steps and artifacts_enabled() else None
 
-    contrast = enhance_contrast(denoised_img)
-    steps["contrast_enhanced"] = _img_to_base64_thumb(contrast, max_width=400)
+    _capture_step(steps, "original", cv2_img)
 
-    deskewed = deskew(contrast)
-    steps["deskewed"] = _img_to_base64_thumb(deskewed, max_width=400)
+    gray = to_grayscale(cv2_img)
+    _capture_step(steps, "grayscale", gray)
+
+    # Measure on a downscaled copy, then run only the planned stages
+    start = time.perf_counter()
+    plan = plan_preprocessing(gray)
+    plan["plan_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    processed = run_plan(gray, plan, on_stage=lambda name, img: _capture_step(steps, name, img))
+
+    # Final OCR (one Tesseract call for text + layout)
+    engine = get_engine()
+    start = time.perf_counter()
+    data = engine.image_to_data(processed)
+    plan["ocr_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    plan["ocr_engine"] = engine.name
+    text, text_blocks = parse_tesseract_data(data)
+    plan["mean_confidence"] = _mean_word_confidence(data)
+
+    return text, text_blocks, steps, plan
+
+
+def _mean_word_confidence(data: dict) -> Optional[float]:
+    """Mean Tesseract confidence over recognized words (None if there are none)."""
+    confs = [
+        float(conf) for conf, word in zip(data["conf"], data["text"])
+        if word.strip() and float(conf) >= 0
+    ]
+    return round(sum(confs) / len(confs), 1) if confs else None
+
+
+def ocr_pdf_page_with_steps(
+    page: fitz.Page, render: Optional[dict] = None,
+) -> tuple[str, list[dict], Optional[dict], dict]:
+    """
+    OCR a PDF page by rendering to image first, then running the full pipeline.
+    render is a choose_ocr_dpi() result (computed here if not given). The page
+    is rendered straight to a grayscale pixmap and handed to the pipeline as a
+    view of its samples, so the render itself is the only full-size copy.
+    Layout block bboxes are converted from rendered pixels to PDF points.
+    """
+    if render is None:
+        render = choose_ocr_dpi(page)
+    dpi = render["dpi"]
 
-    binarized = binarize(deskewed)
-    steps["binarized"] = _img_to_base64_thumb(binarized, max_width=400)
+    start = time.perf_counter()
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    gray = _pixmap_array(pix)
+    render_ms = round((time.perf_counter() - start) * 1000, 1)
 
-    # Final OCR
-    processed_pil = cv2_to_pil(binarized)
-    text = pytesseract.image_to_string(processed_pil, lang="eng")
+    # pix stays referenced until OCR is done: gray is a view of its samples
+    text, text_blocks, steps, plan = ocr_image_with_steps(gray)
+    plan["render"] = {**render, "render_ms": render_ms}
+    return text, _scale_blocks(text_blocks, 72 / dpi), steps, plan
 
-    return text.strip(), steps
 
+def ocr_pdf_regions(
+    page: fitz.Page, regions: list[dict], render: Optional[dict] = None,
+) -> tuple[str, list[dict], Optional[dict], dict]:
+    """
+    OCR only some regions of a PDF page (its image blocks). Each region is
+    rendered through a page clip at the page's OCR DPI and run through the
+    pipeline on its own. regions: [{"block_index", "bbox"}] in PDF points.
+    Returned blocks are in page points and carry the block_index of the
+    region they were read from; no stage images are captured.
+    Returns (ocr_text, text_blocks, None, plan) like ocr_pdf_page_with_steps.
+    """
+    if render is None:
+        render = choose_ocr_dpi(page)
+    dpi = render["dpi"]
+
+    texts, blocks, region_plans = [], [], []
+    render_ms = 0.0
+    for region in regions:
+        clip = fitz.Rect(region["bbox"]) & page.rect
+        if clip.is_empty:
+            continue
+        start = time.perf_counter()
+        pix = page.get_pixmap(dpi=dpi, clip=clip, colorspace=fitz.csGRAY, alpha=False)
+        render_ms += (time.perf_counter() - start) * 1000
+
+        text, region_blocks, _, plan = ocr_image_with_steps(_pixmap_array(pix), capture_steps=False)
+        for block in _scale_blocks(region_blocks, 72 / dpi, offset=(clip.x0, clip.y0)):
+            block["block_index"] = region["block_index"]
+            block["source"] = "ocr"
+            blocks.append(block)
+        if text:
+            texts.append(text)
+        region_plans.append({
+            "block_index": region["block_index"],
+            "bbox": [round(v, 1) for v in clip],
+            "pixels": [pix.width, pix.height],
+            "chars": len(text),
+            "stages": plan["stages"],
+            "ocr_ms": plan["ocr_ms"],
+        })
 
-def ocr_pdf_page_with_steps(page: fitz.Page, dpi: int = 300) -> tuple[str, dict]:
-    """OCR a PDF page by rendering to image first, then running the full pipeline."""
-    pix = page.get_pixmap(dpi=dpi)
-    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-    cv2_img = pil_to_cv2(img)
-    return ocr_image_with_steps(cv2_img)
+    plan = {
+        "mode": "regions",
+        "render": {**render, "render_ms": round(render_ms, 1)},
+        "regions": region_plans,
+    }
+    return "\n\n".join(texts), blocks, None, plan
 
 
 # ──────────────────────────────────────────────────────────────────
 # Utilities
 # ──────────────────────────────────────────────────────────────────
 
-def _img_to_base64_thumb(img: np.ndarray, max_width: int = 400) -> str:
-    """Convert a CV2 image to a small base64 JPEG thumbnail."""
-    pil_img = cv2_to_pil(img)
-    w, h = pil_img.size
-    if w > max_width:
-        ratio = max_width / w
-        pil_img = pil_img.resize((max_width, int(h * ratio)), Image.LANCZOS)
-
-    buffer = io.BytesIO()
-    pil_img.save(buffer, format="JPEG", quality=60)
-    return base64.b64encode(buffer.getvalue()).decode("utf-8")
+def _capture_step(steps: Optional[dict], name: str, img: np.ndarray):
+    """Store a stage image as an artifact and record its URL (no-op when disabled)."""
+    if steps is not None:
+        steps[name] = artifact_url(save_image(img, max_width=400))
 
 
 def get_file_metadata(file_path: str) -> dict:
@@ -340,11 +820,11 @@ def get_file_metadata(file_path: str) -> dict:
         }
         doc.close()
     else:
-        # Image file — always 1 page
+        # Image file — one page per frame (multi-page TIFF)
         img = Image.open(file_path)
         metadata = {
             "filename": path.name,
-            "page_count": 1,
+            "page_count": getattr(img, "n_frames", 1),
             "file_type": "image",
             "metadata": {
                 "format": img.format,
@@ -354,35 +834,5 @@ def get_file_metadata(file_path: str) -> dict:
         }
         img.close()
 
+    metadata["file_size"] = path.stat().st_size
     return metadata
-
-
-def chunk_text(text: str, chunk_size: int = 500, overlap: int = 50) -> list[str]:
-    """
-    Split text into overlapping chunks for embedding.
-    Uses sentence-aware splitting to avoid cutting mid-sentence.
-    """
-    if not text:
-        return []
-
-    sentences = text.replace("\n", " ").split(". ")
-    chunks = []
-    current_chunk = ""
-
-    for sentence in sentences:
-        sentence = sentence.strip()
-        if not sentence:
-            continue
-
-        if len(current_chunk) + len(sentence) > chunk_size and current_chunk:
-            chunks.append(current_chunk.strip())
-            words = current_chunk.split()
-            overlap_text = " ".join(words[-overlap // 5:]) if len(words) > overlap // 5 else ""
-            current_chunk = overlap_text + " " + sentence + ". "
-        else:
-            current_chunk += sentence + ". "
-
-    if current_chunk.strip():
-        chunks.append(current_chunk.strip())
-
-    return chunks
@@ -0,0 +1,131 @@
+"""
+Page-level extraction cache shared across documents.
+
+Two tiers, both stored in SQLite:
+  - OCR results keyed by the hash of the rendered page (+ OCR settings), so
+    PDFs that share scanned pages never OCR the same page twice.
+  - Chunks + embeddings keyed by the hash of the page text (+ chunking and
+    embedding settings), so identical pages skip chunking and embedding.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from array import array
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS page_ocr (
+    key  TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS page_chunks (
+    key        TEXT PRIMARY KEY,
+    chunks     TEXT NOT NULL,
+    embeddings BLOB NOT NULL,
+    dim        INTEGER NOT NULL
+);
+"""
+
+_conn = None
+_lock = threading.RLock()
+
+
+def get_connection() -> sqlite3.Connection:
+    """Get or create the SQLite connection for the cache."""
+    global _conn
+    if _conn is None:
+        with _lock:
+            if _conn is None:
+                path = Path(settings.PAGE_CACHE_PATH)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(str(path), check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                _conn = conn
+    return _conn
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# ──────────────────────────────────────────────────────────────────
+# OCR tier
+# ──────────────────────────────────────────────────────────────────
+
+def get_page_ocr(key: str) -> Optional[dict]:
+    """Cached OCR result ({ocr_text, text_blocks, preprocessing_steps, preprocessing_plan}) or None."""
+    if not settings.PAGE_CACHE_ENABLED:
+        return None
+    conn = get_connection()
+    with _lock:
+        row = conn.execute("SELECT data FROM page_ocr WHERE key = ?", (key,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def put_page_ocr(key: str, result: dict) -> None:
+    if not settings.PAGE_CACHE_ENABLED:
+        return
+    conn = get_connection()
+    with _lock, conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO page_ocr(key, data) VALUES (?, ?)",
+            (key, json.dumps(result)),
+        )
+
+
+# ──────────────────────────────────────────────────────────────────
+# Chunk + embedding tier
+# ──────────────────────────────────────────────────────────────────
+
+def chunk_cache_key(page_text: str) -> str:
+    """Key for a page's chunks: its text plus everything that shapes the output."""
+    fingerprint = (
+        f"{settings.EMBEDDING_MODEL}@{settings.EMBEDDING_BACKEND}"
+        f"|tokens-v1|{settings.CHUNK_TOKENS}|{settings.CHUNK_OVERLAP_TOKENS}"
+    )
+    return hash_text(f"{fingerprint}\n{page_text}")
+
+
+def get_page_chunks(key: str) -> Optional[tuple[list[dict], list[list[float]]]]:
+    """Cached (chunks, embeddings) for a page, or None. Chunks are chunking.py dicts."""
+    if not settings.PAGE_CACHE_ENABLED:
+        return None
+    conn = get_connection()
+    with _lock:
+        row = conn.execute(
+            "SELECT chunks, embeddings, dim FROM page_chunks WHERE key = ?", (key,)
+        ).fetchone()
+    if row is None:
+        return None
+
+    chunks = json.loads(row[0])
+    flat = array("f")
+    flat.frombytes(row[1])
+    dim = row[2]
+    embeddings = [flat[i * dim:(i + 1) * dim].tolist() for i in range(len(chunks))]
+    return chunks, embeddings
+
+
+def put_page_chunks(key: str, chunks: list[dict], embeddings: list[list[float]]) -> None:
+    if not settings.PAGE_CACHE_ENABLED or not chunks:
+        return
+    flat = array("f")
+    for emb in embeddings:
+        flat.extend(emb)
+
+    conn = get_connection()
+    with _lock, conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO page_chunks(key, chunks, embeddings, dim) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(chunks), flat.tobytes(), len(embeddings[0])),
+        )
@@ -0,0 +1,122 @@
+"""
+Search result cache.
+
+Bounded LRU of finished search results keyed by the normalized request
+(search type, query text, top_k and any hybrid options). Every entry is tagged
+with the corpus generation it was computed at (see keyword_index); the vector
+store bumps the generation on every ingest and delete, and a lookup that sees a
+newer generation drops the whole cache, so results never outlive the corpus
+they were computed from.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from app.core.config import settings
+from app.services.embedding_cache import normalize_query
+
+
+def make_key(search_type: str, query: str, top_k: int, **options) -> tuple:
+    """Cache key for a request; options left at None (settings defaults) are ignored."""
+    extra = tuple(sorted((k, v) for k, v in options.items() if v is not None))
+    return (search_type, normalize_query(query), top_k, extra)
+
+
+def _estimate_size(results: list[dict]) -> int:
+    """Approximate bytes held by a cached result list."""
+    size = sys.getsizeof(results)
+    for result in results:
+        size += sys.getsizeof(result)
+        for value in result.values():
+            size += sys.getsizeof(value)
+            if isinstance(value, list):
+                size += sum(sys.getsizeof(item) for item in value)
+    return size
+
+
+class SearchResultCache:
+    """Thread-safe LRU of search results, invalidated by corpus generation."""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.generation = None
+        self._entries: OrderedDict[tuple, tuple[list[dict], int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, generation: int) -> Optional[list[dict]]:
+        with self._lock:
+            self._check_generation(generation)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            # Shallow copies so callers can't mutate the cached dicts
+            return [dict(result) for result in entry[0]]
+
+    def put(self, key: tuple, results: list[dict], generation: int):
+        with self._lock:
+            self._check_generation(generation)
+            if generation != self.generation:
+                return  # computed against an older corpus
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            size = _estimate_size(results)
+            self._entries[key] = ([dict(result) for result in results], size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.invalidations = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "approx_bytes": self._bytes,
+                "generation": self.generation,
+                "invalidations": self.invalidations,
+            }
+
+    def _check_generation(self, generation: int):
+        """Drop everything once the corpus has moved on (caller holds the lock)."""
+        if self.generation is None or generation > self.generation:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._bytes = 0
+            self.generation = generation
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchResultCache:
+    """Get or create the process-wide search result cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SearchResultCache(max_entries=settings.SEARCH_CACHE_SIZE)
+    return _cache
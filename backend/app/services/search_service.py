@@ -1,18 +1,52 @@
 """
 Search service combining semantic (vector) search and keyword (BM25) search.
-Runs NER on returned snippets so entities are visible in search results.
+Hybrid search runs both legs concurrently and fuses them by chunk id
+(reciprocal rank fusion, or min-max / z-score normalized score fusion).
+run_search() is the cached entry point used by the API (see search_cache.py).
+Entities shown with each result are precomputed at ingestion and read from the
+chunk metadata; NER only runs for legacy chunks stored without them.
 """
 
-from rank_bm25 import BM25Okapi
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
-from app.services.embedding_service import generate_single_embedding
-from app.services.vector_store import search_similar, get_collection
+from app.core.config import settings
+
+from app.services import keyword_index
+from app.services.search_cache import get_search_cache, make_key
+from app.services.embedding_service import embed_query
+from app.services.vector_store import search_similar, get_chunks_by_ids, sync_keyword_index
 from app.services.ner_service import extract_entities
 
+# Checked once per process: backfills the keyword index from ChromaDB if needed
+_keyword_index_synced = False
+
+FUSION_STRATEGIES = ("rrf", "minmax", "zscore")
+
+# Runs the semantic leg of hybrid searches next to the keyword leg
+_leg_executor = None
+_leg_executor_lock = threading.Lock()
+
+
+def _stored_entities(meta: dict) -> Optional[list[dict]]:
+    """Entities precomputed at ingestion, or None for chunks stored without them."""
+    raw = meta.get("entities")
+    if raw is None:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
+
 
 def _enrich_with_entities(results: list[dict]) -> list[dict]:
-    """Run NER on each result snippet and attach entities."""
+    """Run NER only on results that have no precomputed entities."""
     for result in results:
+        if result["entities"] is not None:
+            continue
         try:
             ents = extract_entities(result["chunk_text"][:2000])
             result["entities"] = ents[:10]  # Keep top 10 to avoid bloat
@@ -21,9 +55,18 @@ def _enrich_with_entities(results: list[dict]) -> list[dict]:
     return results
 
 
-def semantic_search(query: str, top_k: int = 10) -> list[dict]:
-    """Perform semantic search using vector similarity."""
-    query_embedding = generate_single_embedding(query)
+def semantic_search(
+    query: str,
+    top_k: int = 10,
+    query_embedding: Optional[list[float]] = None,
+    enrich: bool = True,
+) -> list[dict]:
+    """
+    Perform semantic search using vector similarity.
+    enrich=False leaves legacy results without entities (entities=None).
+    """
+    if query_embedding is None:
+        query_embedding = embed_query(query)
     results = search_similar(query_embedding, top_k=top_k)
 
     search_results = []
@@ -36,84 +79,230 @@ def semantic_search(query: str, top_k: int = 10) -> list[dict]:
             score = 1 - distance
 
             search_results.append({
+                "chunk_id": results["ids"][0][i],
                 "document_id": meta.get("document_id", ""),
                 "filename": meta.get("filename", ""),
                 "chunk_text": results["documents"][0][i],
                 "page_number": meta.get("page_number", 0),
                 "score": round(score, 4),
                 "extraction_method": meta.get("extraction_method", ""),
-                "entities": [],
+                "entities": _stored_entities(meta),
             })
 
-    return _enrich_with_entities(search_results)
-
+    return _enrich_with_entities(search_results) if enrich else search_results
 
-def keyword_search(query: str, top_k: int = 10) -> list[dict]:
-    """Perform keyword search using BM25."""
-    collection = get_collection()
 
-    # Get all documents from collection
-    all_docs = collection.get(include=["documents", "metadatas"])
+def keyword_search(query: str, top_k: int = 10, enrich: bool = True) -> list[dict]:
+    """
+    Perform keyword search using the persistent BM25 index.
+    enrich=False leaves legacy results without entities (entities=None).
+    """
+    global _keyword_index_synced
+    if not _keyword_index_synced:
+        sync_keyword_index()
+        _keyword_index_synced = True
 
-    if not all_docs["documents"]:
+    # Score only the postings of the query terms
+    hits = keyword_index.search(query, top_k=top_k)
+    if not hits:
         return []
 
-    # Tokenize documents for BM25
-    tokenized_docs = [doc.lower().split() for doc in all_docs["documents"]]
-    bm25 = BM25Okapi(tokenized_docs)
-
-    # Search
-    tokenized_query = query.lower().split()
-    scores = bm25.get_scores(tokenized_query)
-
-    # Get top-k results
-    top_indices = scores.argsort()[-top_k:][::-1]
+    # Fetch text + metadata just for the winning chunks
+    chunks = get_chunks_by_ids([chunk_id for chunk_id, _ in hits])
 
     search_results = []
-    for idx in top_indices:
-        if scores[idx] > 0:
-            meta = all_docs["metadatas"][idx] if all_docs["metadatas"] else {}
-            search_results.append({
-                "document_id": meta.get("document_id", ""),
-                "filename": meta.get("filename", ""),
-                "chunk_text": all_docs["documents"][idx],
-                "page_number": meta.get("page_number", 0),
-                "score": round(float(scores[idx]), 4),
-                "extraction_method": meta.get("extraction_method", ""),
-                "entities": [],
-            })
+    for chunk_id, score in hits:
+        chunk = chunks.get(chunk_id)
+        if chunk is None or score <= 0:
+            continue
+        meta = chunk["metadata"] or {}
+        search_results.append({
+            "chunk_id": chunk_id,
+            "document_id": meta.get("document_id", ""),
+            "filename": meta.get("filename", ""),
+            "chunk_text": chunk["text"],
+            "page_number": meta.get("page_number", 0),
+            "score": round(float(score), 4),
+            "extraction_method": meta.get("extraction_method", ""),
+            "entities": _stored_entities(meta),
+        })
 
-    return _enrich_with_entities(search_results)
+    return _enrich_with_entities(search_results) if enrich else search_results
 
 
-def hybrid_search(query: str, top_k: int = 10, semantic_weight: float = 0.7) -> list[dict]:
+def hybrid_search(
+    query: str,
+    top_k: int = 10,
+    semantic_weight: Optional[float] = None,
+    fusion: Optional[str] = None,
+    candidate_k: Optional[int] = None,
+    timings: Optional[dict] = None,
+) -> list[dict]:
     """
-    Combine semantic and keyword search with weighted scoring.
+    Combine semantic and keyword search. Both legs run concurrently and their
+    results are merged by chunk id with one of FUSION_STRATEGIES:
+      - "rrf":    weighted reciprocal rank fusion (uses ranks only, scale-free)
+      - "minmax": weighted sum of min-max normalized scores
+      - "zscore": weighted sum of z-score normalized scores
     semantic_weight: 0.0 = pure keyword, 1.0 = pure semantic.
+    candidate_k: results fetched per leg (default top_k * HYBRID_CANDIDATE_MULTIPLIER).
+    timings: if given, filled with per-leg and fusion wall times in milliseconds.
     """
-    semantic_results = semantic_search(query, top_k=top_k * 2)
-    keyword_results = keyword_search(query, top_k=top_k * 2)
+    fusion = fusion or settings.HYBRID_FUSION
+    if fusion not in FUSION_STRATEGIES:
+        raise ValueError(f"Unknown fusion '{fusion}'. Use one of: {', '.join(FUSION_STRATEGIES)}")
+    if semantic_weight is None:
+        semantic_weight = settings.HYBRID_SEMANTIC_WEIGHT
+    if not 0.0 <= semantic_weight <= 1.0:
+        raise ValueError(f"semantic_weight must be between 0 and 1, got {semantic_weight}")
+    candidate_k = max(candidate_k or top_k * settings.HYBRID_CANDIDATE_MULTIPLIER, top_k)
+
+    # Semantic leg (embedding + ANN) runs on the pool while BM25 runs here
+    semantic_future = _get_leg_executor().submit(
+        _timed, semantic_search, query, top_k=candidate_k, enrich=False
+    )
+    keyword_results, keyword_ms = _timed(keyword_search, query, top_k=candidate_k, enrich=False)
+    semantic_results, semantic_ms = semantic_future.result()
 
-    # Merge results by chunk text (deduplicate)
+    start = time.perf_counter()
+    legs = [(semantic_results, semantic_weight), (keyword_results, 1 - semantic_weight)]
+    if fusion == "rrf":
+        results = _fuse_rrf(legs, k=settings.RRF_K)
+    else:
+        results = _fuse_normalized(legs, method=fusion)
+    fusion_ms = (time.perf_counter() - start) * 1000
+
+    if timings is not None:
+        timings.update({
+            "fusion": fusion,
+            "candidate_k": candidate_k,
+            "semantic_ms": round(semantic_ms, 2),
+            "keyword_ms": round(keyword_ms, 2),
+            "fusion_ms": round(fusion_ms, 2),
+        })
+
+    # NER fallback only for what is actually returned
+    return _enrich_with_entities(results[:top_k])
+
+
+def run_search(
+    search_type: str,
+    query: str,
+    top_k: int = 10,
+    timings: Optional[dict] = None,
+    **options,
+) -> list[dict]:
+    """
+    Run a "semantic", "keyword" or "hybrid" search (anything else is treated as
+    semantic) through the result cache. options (fusion, semantic_weight,
+    candidate_k) only apply to hybrid search. timings, if given, gets the cache
+    outcome and, for uncached hybrid searches, the per-leg timings.
+    """
+    if search_type == "hybrid":
+        search_fn = hybrid_search
+    else:
+        search_type = "keyword" if search_type == "keyword" else "semantic"
+        search_fn = keyword_search if search_type == "keyword" else semantic_search
+        options = {}
+
+    def compute() -> list[dict]:
+        if search_fn is hybrid_search:
+            return hybrid_search(query, top_k=top_k, timings=timings, **options)
+        return search_fn(query, top_k=top_k)
+
+    if settings.SEARCH_CACHE_SIZE <= 0:
+        return compute()
+
+    # Read the generation before searching: a result computed while the corpus
+    # changes is tagged with the older generation and dropped on the next lookup
+    cache = get_search_cache()
+    key = make_key(search_type, query, top_k, **options)
+    generation = keyword_index.get_generation()
+
+    results = cache.get(key, generation)
+    if timings is not None:
+        timings["cache"] = "miss" if results is None else "hit"
+    if results is None:
+        results = compute()
+        cache.put(key, results, generation)
+    return results
+
+
+# ──────────────────────────────────────────────────────────────────
+# Hybrid helpers
+# ──────────────────────────────────────────────────────────────────
+
+def _get_leg_executor() -> ThreadPoolExecutor:
+    """Get or create the pool that runs the semantic leg of hybrid searches."""
+    global _leg_executor
+    if _leg_executor is None:
+        with _leg_executor_lock:
+            if _leg_executor is None:
+                _leg_executor = ThreadPoolExecutor(
+                    max_workers=settings.HYBRID_LEG_WORKERS, thread_name_prefix="hybrid-leg"
+                )
+    return _leg_executor
+
+
+def _timed(fn, *args, **kwargs):
+    """Call fn and return (result, elapsed milliseconds)."""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def _fuse_rrf(legs: list[tuple[list[dict], float]], k: int = 60) -> list[dict]:
+    """Weighted reciprocal rank fusion: score = Σ weight / (k + rank)."""
     combined = {}
+    for results, weight in legs:
+        for rank, result in enumerate(results, start=1):
+            entry = combined.setdefault(result["chunk_id"], {**result, "score": 0.0})
+            entry["score"] += weight / (k + rank)
+    return _ranked(combined)
+
 
-    for result in semantic_results:
-        key = result["chunk_text"][:100]
-        combined[key] = {
-            **result,
-            "score": result["score"] * semantic_weight,
-        }
-
-    for result in keyword_results:
-        key = result["chunk_text"][:100]
-        if key in combined:
-            combined[key]["score"] += result["score"] * (1 - semantic_weight)
-        else:
-            combined[key] = {
-                **result,
-                "score": result["score"] * (1 - semantic_weight),
-            }
-
-    # Sort by combined score
-    results = sorted(combined.values(), key=lambda x: x["score"], reverse=True)
-    return results[:top_k]
+def _normalize(scores: list[float], method: str) -> list[float]:
+    """Min-max scale to [0, 1] or standardize to z-scores."""
+    if method == "minmax":
+        low, high = min(scores), max(scores)
+        if high == low:
+            return [1.0] * len(scores)
+        return [(s - low) / (high - low) for s in scores]
+
+    mean = sum(scores) / len(scores)
+    std = (sum((s - mean) ** 2 for s in scores) / len(scores)) ** 0.5
+    if std == 0:
+        return [0.0] * len(scores)
+    return [(s - mean) / std for s in scores]
+
+
+def _fuse_normalized(legs: list[tuple[list[dict], float]], method: str = "minmax") -> list[dict]:
+    """
+    Weighted sum of per-leg normalized scores. A chunk missing from a leg gets
+    that leg's lowest normalized score (0 for min-max), so being found by only
+    one leg is never better than being found last by both.
+    """
+    normalized_legs = []
+    for results, weight in legs:
+        if results:
+            scores = _normalize([r["score"] for r in results], method)
+            by_id = {r["chunk_id"]: s for r, s in zip(results, scores)}
+            normalized_legs.append((by_id, min(scores), weight))
+
+    combined = {}
+    for results, _ in legs:
+        for result in results:
+            combined.setdefault(result["chunk_id"], {**result})
+
+    for chunk_id, entry in combined.items():
+        entry["score"] = sum(
+            weight * by_id.get(chunk_id, floor) for by_id, floor, weight in normalized_legs
+        )
+    return _ranked(combined)
+
+
+def _ranked(combined: dict[str, dict]) -> list[dict]:
+    results = sorted(combined.values(), key=lambda r: r["score"], reverse=True)
+    for result in results:
+        result["score"] = round(result["score"], 4)
+    return results
@@ -1,11 +1,17 @@
 """
 Vector store service using ChromaDB.
 Handles storage and retrieval of document embeddings.
+
+Every write also updates the keyword index and the document registry, and bumps
+the corpus generation, so the three stores and the search cache stay in step.
 """
 
+from typing import Optional
+
 import chromadb
 from chromadb.config import Settings as ChromaSettings
 from app.core.config import settings
+from app.services import keyword_index, document_registry
 
 # Singleton client
 _client = None
@@ -37,20 +43,67 @@ def add_document_chunks(
     chunks: list[str],
     embeddings: list[list[float]],
     metadatas: list[dict],
+    document: Optional[dict] = None,
+    start_index: int = 0,
 ):
-    """Add document chunks with embeddings to the vector store."""
-    collection = get_collection()
-
-    ids = [f"{doc_id}_chunk_{i}" for i in range(len(chunks))]
-
-    collection.add(
-        ids=ids,
-        documents=chunks,
-        embeddings=embeddings,
-        metadatas=metadatas,
-    )
-
-    return len(ids)
+    """
+    Add document chunks with embeddings to the vector store.
+    start_index numbers the chunks when a document is stored in several batches.
+    document, if given, is the registry record for the document (see
+    document_registry.py); it is written with chunk_count = start_index + chunks
+    stored, even when there are no chunks to store.
+    """
+    return add_documents([{
+        "doc_id": doc_id,
+        "chunks": chunks,
+        "embeddings": embeddings,
+        "metadatas": metadatas,
+        "document": document,
+        "start_index": start_index,
+    }])[0]
+
+
+def add_documents(batch: list[dict]) -> list[int]:
+    """
+    Store the chunks of several documents at once: one ChromaDB write per
+    max batch size, one keyword index transaction, one generation bump.
+    Each item has doc_id, chunks, embeddings, metadatas and optionally
+    document and start_index (see add_document_chunks).
+    Returns the number of chunks stored per document.
+    """
+    ids, chunks, embeddings, metadatas, doc_ids = [], [], [], [], []
+    counts = []
+    for item in batch:
+        start = item.get("start_index", 0)
+        item_ids = [f"{item['doc_id']}_chunk_{start + i}" for i in range(len(item["chunks"]))]
+        ids.extend(item_ids)
+        chunks.extend(item["chunks"])
+        embeddings.extend(item["embeddings"])
+        metadatas.extend(item["metadatas"])
+        doc_ids.extend([item["doc_id"]] * len(item_ids))
+        counts.append(len(item_ids))
+
+    if ids:
+        collection = get_collection()
+        step = get_client().get_max_batch_size()
+        for start in range(0, len(ids), step):
+            collection.add(
+                ids=ids[start:start + step],
+                documents=chunks[start:start + step],
+                embeddings=embeddings[start:start + step],
+                metadatas=metadatas[start:start + step],
+            )
+        keyword_index.add_chunks(ids, chunks, doc_ids)
+
+    records = [
+        {**item["document"], "id": item["doc_id"], "chunk_count": item.get("start_index", 0) + count}
+        for item, count in zip(batch, counts) if item.get("document") is not None
+    ]
+    if records:
+        document_registry.upsert_documents(records)
+    keyword_index.bump_generation()
+
+    return counts
 
 
 def search_similar(
@@ -69,24 +122,77 @@ def search_similar(
     return results
 
 
-def get_all_documents() -> list[dict]:
-    """Get metadata of all stored documents."""
+def get_chunks_by_ids(chunk_ids: list[str]) -> dict[str, dict]:
+    """Fetch chunk text + metadata for specific chunk IDs, keyed by ID."""
+    if not chunk_ids:
+        return {}
+
+    collection = get_collection()
+    results = collection.get(ids=chunk_ids, include=["documents", "metadatas"])
+
+    chunks = {}
+    for i, chunk_id in enumerate(results["ids"]):
+        chunks[chunk_id] = {
+            "text": results["documents"][i],
+            "metadata": results["metadatas"][i] if results["metadatas"] else {},
+        }
+    return chunks
+
+
+def sync_keyword_index(batch_size: int = 1000):
+    """
+    Rebuild the keyword index from ChromaDB if it is out of date
+    (built with a different analyzer, or missing chunks stored before it existed).
+    """
+    total = get_collection_count()
+    if keyword_index.is_current() and keyword_index.get_chunk_count() == total:
+        return
+
+    print(f"🔄 Rebuilding keyword index from {total} stored chunks...")
+    keyword_index.clear()
     collection = get_collection()
-    results = collection.get(include=["metadatas"])
+    for offset in range(0, total, batch_size):
+        batch = collection.get(include=["documents", "metadatas"], offset=offset, limit=batch_size)
+        keyword_index.add_chunks(
+            batch["ids"],
+            batch["documents"],
+            [meta.get("document_id", "unknown") for meta in batch["metadatas"]],
+        )
+    print("✅ Keyword index rebuilt.")
 
-    # Extract unique documents
-    docs = {}
-    for meta in results["metadatas"]:
-        doc_id = meta.get("document_id", "unknown")
-        if doc_id not in docs:
-            docs[doc_id] = {
-                "id": doc_id,
-                "filename": meta.get("filename", "unknown"),
-                "page_count": meta.get("page_count", 0),
-                "upload_date": meta.get("upload_date", ""),
-            }
 
-    return list(docs.values())
+def sync_document_registry(batch_size: int = 1000):
+    """
+    Backfill the document registry from chunk metadata if it is empty while
+    ChromaDB is not (documents ingested before the registry existed).
+    """
+    if document_registry.get_stats()["total_documents"] > 0:
+        return
+    total = get_collection_count()
+    if total == 0:
+        return
+
+    print(f"🔄 Building document registry from {total} stored chunks...")
+    docs = {}
+    collection = get_collection()
+    for offset in range(0, total, batch_size):
+        batch = collection.get(include=["metadatas"], offset=offset, limit=batch_size)
+        for meta in batch["metadatas"]:
+            doc_id = meta.get("document_id", "unknown")
+            if doc_id not in docs:
+                docs[doc_id] = {
+                    "id": doc_id,
+                    "filename": meta.get("filename", "unknown"),
+                    "file_hash": meta.get("file_hash"),
+                    "file_type": meta.get("file_type", ""),
+                    "page_count": meta.get("page_count", 0),
+                    "upload_date": meta.get("upload_date", ""),
+                    "chunk_count": 0,
+                }
+            docs[doc_id]["chunk_count"] += 1
+
+    document_registry.upsert_documents(list(docs.values()))
+    print(f"✅ Document registry built ({len(docs)} documents).")
 
 
 def get_collection_count() -> int:
@@ -105,3 +211,6 @@ def delete_document(doc_id: str):
     )
     if results["ids"]:
         collection.delete(ids=results["ids"])
+    keyword_index.remove_document(doc_id)
+    document_registry.remove_document(doc_id)
+    keyword_index.bump_generation()
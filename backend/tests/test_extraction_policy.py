@@ -0,0 +1,50 @@
+from app.services.extraction_policy import merge_region_blocks
+
+
+def _line(text, bbox):
+    return {"text": text, "bbox": bbox, "font_size": 0}
+
+
+def test_mixed_page_drops_ocr_lines_under_text_layer():
+    # A figure (block 1) with a caption printed over its lower edge by the text layer
+    layout_blocks = [
+        {"block_index": 0, "type": "text", "bbox": [50, 50, 550, 70],
+         "lines": [_line("Quarterly report", [50, 50, 550, 70])]},
+        {"block_index": 1, "type": "image", "bbox": [50, 100, 550, 400], "lines": []},
+        {"block_index": 2, "type": "text", "bbox": [60, 370, 540, 390],
+         "lines": [_line("Figure 1: Revenue by region", [60, 370, 540, 390])]},
+    ]
+    # OCR of the image reads its own text and the overprinted caption
+    region_blocks = [
+        {"block_index": 1, "type": "text", "source": "ocr", "bbox": [60, 120, 540, 391],
+         "lines": [
+             _line("North 120 South 80", [60, 120, 400, 140]),
+             _line("Figure 1: Revenue by region", [62, 371, 538, 391]),
+         ]},
+        {"block_index": 1, "type": "text", "source": "ocr", "bbox": [61, 369, 539, 389],
+         "lines": [_line("Figure 1: Revenue by region", [61, 369, 539, 389])]},
+    ]
+
+    text, blocks = merge_region_blocks(layout_blocks, region_blocks)
+
+    assert text == "Quarterly report\nNorth 120 South 80\nFigure 1: Revenue by region"
+    assert [b["block_index"] for b in blocks] == [0, 1, 2]
+    assert blocks[1]["bbox"] == [60, 120, 400, 140]
+    assert all(b["type"] == "text" for b in blocks)
+
+
+def test_mixed_page_keeps_image_text_without_overlap():
+    layout_blocks = [
+        {"block_index": 0, "type": "image", "bbox": [0, 0, 200, 100], "lines": []},
+        {"block_index": 1, "type": "text", "bbox": [0, 120, 200, 140],
+         "lines": [_line("Signed", [0, 120, 200, 140])]},
+    ]
+    region_blocks = [
+        {"block_index": 0, "type": "text", "source": "ocr", "bbox": [10, 10, 190, 30],
+         "lines": [_line("J. Smith", [10, 10, 190, 30])]},
+    ]
+
+    text, blocks = merge_region_blocks(layout_blocks, region_blocks)
+
+    assert text == "J. Smith\nSigned"
+    assert blocks[0] is region_blocks[0]
@@ -0,0 +1,109 @@
+import pytest
+
+fitz = pytest.importorskip("fitz")
+pytest.importorskip("cv2")
+
+from app.core.config import settings
+from app.services import ocr_service
+
+PAGE_TEXT = "Quarterly revenue grew in every region and the board approved the annual budget."
+
+
+class FakeEngine:
+    """Stands in for Tesseract: reads one word near the top left of any image."""
+
+    name = "fake"
+
+    def __init__(self, word: str):
+        self.word = word
+        self.calls = 0
+
+    def image_to_data(self, image):
+        self.calls += 1
+        return {
+            "level": [5], "page_num": [1], "block_num": [1], "par_num": [1], "line_num": [1], "word_num": [1],
+            "left": [10], "top": [10], "width": [120], "height": [30], "conf": [95.0], "text": [self.word],
+        }
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    fake = FakeEngine("Signed")
+    monkeypatch.setattr(ocr_service, "get_engine", lambda: fake)
+    monkeypatch.setattr(settings, "PAGE_CACHE_ENABLED", False)
+    return fake
+
+
+def _image(width: int = 400, height: int = 300) -> fitz.Pixmap:
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, width, height), False)
+    pix.clear_with(230)
+    return pix
+
+
+def _decide(page: fitz.Page) -> dict:
+    text, blocks = ocr_service.extract_page_with_layout(page)
+    return ocr_service.decide_page(text, blocks, abs(page.rect))
+
+
+def test_policy_full_page_scan_is_ocrd():
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_image(page.rect, pixmap=_image(1240, 1754))
+
+    decision = _decide(page)
+
+    assert decision["action"] == "ocr_page"
+    assert decision["scores"]["largest_image"] == 1.0
+
+
+def test_policy_searchable_scan_keeps_its_text_layer():
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_image(page.rect, pixmap=_image(1240, 1754))
+    for i in range(3):
+        page.insert_text((72, 72 + 16 * i), PAGE_TEXT, render_mode=3)  # invisible OCR layer
+
+    decision = _decide(page)
+
+    assert decision["action"] == "text_layer"
+    assert decision["reason"].startswith("text layer ok over a page scan")
+
+
+def test_policy_digital_page_with_figure_ocrs_regions():
+    doc = fitz.open()
+    page = doc.new_page()
+    for i in range(3):
+        page.insert_text((72, 72 + 16 * i), PAGE_TEXT)
+    page.insert_image(fitz.Rect(72, 200, 372, 500), pixmap=_image())
+
+    decision = _decide(page)
+
+    assert decision["action"] == "ocr_regions"
+    assert 0.1 <= decision["scores"]["image_coverage"] == decision["scores"]["largest_image"] < 0.5
+
+
+def _extract(doc: fitz.Document, path: str) -> list[dict]:
+    return ocr_service._extract_pdf_pages(doc, path, range(len(doc)), 0, None, 1, 0, len(doc))
+
+
+def test_digital_page_with_figure_ocrs_the_figure(tmp_path, engine):
+    doc = fitz.open()
+    page = doc.new_page()  # 595 x 842 pt
+    for i in range(3):
+        page.insert_text((72, 72 + 16 * i), PAGE_TEXT)
+    page.insert_image(fitz.Rect(72, 200, 372, 500), pixmap=_image())  # ~18% of the page
+    path = str(tmp_path / "figure.pdf")
+    doc.save(path)
+
+    with fitz.open(path) as doc:
+        [page_data] = _extract(doc, path)
+
+    assert page_data["extraction_decision"]["action"] == "ocr_regions"
+    assert page_data["method"] == "mixed"
+    assert engine.calls == 1
+    assert page_data["text"].startswith(PAGE_TEXT)
+    assert page_data["text"].endswith("Signed")
+    ocr_blocks = [b for b in page_data["text_blocks"] if b.get("source") == "ocr"]
+    assert [line["text"] for b in ocr_blocks for line in b["lines"]] == ["Signed"]
+    x0, y0, x1, y1 = ocr_blocks[0]["bbox"]
+    assert 72 <= x0 < x1 <= 372 and 200 <= y0 < y1 <= 500
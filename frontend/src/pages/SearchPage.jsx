@@ -1,6 +1,6 @@
 import { useState } from 'react'
 import { Search, FileText, MessageSquare, Send, Loader2 } from 'lucide-react'
-import { searchDocuments, askQuestion } from '../services/api'
+import { searchDocuments, askQuestionStream } from '../services/api'
 
 export default function SearchPage() {
   const [query, setQuery] = useState('')
@@ -19,13 +19,21 @@ export default function SearchPage() {
     setLoading(true)
     try {
       if (chatMode) {
-        setChatMessages((prev) => [...prev, { role: 'user', content: query }])
-        const response = await askQuestion(query)
         setChatMessages((prev) => [
           ...prev,
-          { role: 'assistant', content: response.answer, sources: response.sources },
+          { role: 'user', content: query },
+          { role: 'assistant', content: '', sources: [] },
         ])
         setQuery('')
+
+        // Update the last (assistant) message as sources and tokens stream in
+        const updateAnswer = (update) =>
+          setChatMessages((prev) => [...prev.slice(0, -1), update(prev[prev.length - 1])])
+
+        await askQuestionStream(query, {
+          onSources: (sources) => updateAnswer((msg) => ({ ...msg, sources })),
+          onToken: (token) => updateAnswer((msg) => ({ ...msg, content: msg.content + token })),
+        })
       } else {
         const response = await searchDocuments(query, searchType)
         setResults(response)
@@ -196,10 +196,21 @@ export default function UploadPage() {
                                         : 'bg-orange-100 text-orange-700'
                                     }`}
                                   >
-                                    {detail.primary_method === 'digital' ? '📄 Digital (PyMuPDF)' : '🔍 OCR (Tesseract)'}
+                                    {detail.primary_method === 'digital'
+                                      ? '📄 Digital (PyMuPDF)'
+                                      : detail.primary_method === 'mixed'
+                                        ? '🧩 Digital + region OCR'
+                                        : '🔍 OCR (Tesseract)'}
                                   </span>
                                 </div>
 
+                                {/* Text-layer policy decision */}
+                                {detail.extraction_decision && (
+                                  <p className="text-xs text-gray-500 mb-2">
+                                    🧭 {detail.extraction_decision.action.replace('_', ' ')} — {detail.extraction_decision.reason}
+                                  </p>
+                                )}
+
                                 {/* Digital vs OCR Comparison */}
                                 {detail.has_digital && detail.has_ocr && (
                                   <div className="grid grid-cols-2 gap-3 mb-3">
@@ -225,10 +236,10 @@ export default function UploadPage() {
                                       <Cpu className="h-3 w-3" /> View image preprocessing pipeline
                                     </summary>
                                     <div className="mt-2 grid grid-cols-3 gap-2">
-                                      {Object.entries(detail.preprocessing_steps).map(([step, base64]) => (
+                                      {Object.entries(detail.preprocessing_steps).map(([step, url]) => (
                                         <div key={step} className="text-center">
                                           <img
-                                            src={`data:image/jpeg;base64,${base64}`}
+                                            src={url}
                                             alt={step}
                                             className="rounded border w-full"
                                           />
@@ -9,17 +9,41 @@ const api = axios.create({
 
 // ── Document Endpoints ──
 
-export const uploadDocument = async (file) => {
+const JOB_POLL_INTERVAL_MS = 1000
+
+// Uploads are processed in the background: queue the file, then poll the job
+// until it finishes and return the processed document.
+export const uploadDocument = async (file, onProgress) => {
   const formData = new FormData()
   formData.append('file', file)
   const response = await api.post('/documents/upload', formData, {
     headers: { 'Content-Type': 'multipart/form-data' },
   })
+
+  const jobId = response.data.job_id
+  for (;;) {
+    const job = await getJobStatus(jobId)
+    if (onProgress) onProgress(job)
+    if (job.status === 'completed') return job.result
+    if (job.status === 'failed') throw new Error(job.error || 'Processing failed')
+    if (job.status === 'cancelled') throw new Error('Processing was cancelled')
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS))
+  }
+}
+
+export const getJobStatus = async (jobId) => {
+  const response = await api.get(`/documents/jobs/${jobId}`)
+  return response.data
+}
+
+export const cancelJob = async (jobId) => {
+  const response = await api.post(`/documents/jobs/${jobId}/cancel`)
   return response.data
 }
 
-export const listDocuments = async () => {
-  const response = await api.get('/documents/')
+// Returns { documents, next_cursor }; pass next_cursor back as params.cursor
+export const listDocuments = async (params = {}) => {
+  const response = await api.get('/documents/', { params })
   return response.data
 }
 
@@ -54,4 +78,44 @@ export const askQuestion = async (question, topK = 20) => {
   return response.data
 }
 
+// Streams an answer: onSources(sources) fires once, then onToken(text) per token.
+// Returns the full answer. Abort via the optional AbortSignal to stop generation.
+export const askQuestionStream = async (question, { onSources, onToken, signal } = {}, topK = 20) => {
+  const response = await fetch(`${API_BASE}/chat/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ question, top_k: topK }),
+    signal,
+  })
+  if (!response.ok) throw new Error(`Chat failed (${response.status})`)
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  let answer = ''
+
+  for (;;) {
+    const { value, done } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+
+    const lines = buffer.split('\n')
+    buffer = lines.pop()
+    for (const line of lines) {
+      if (!line.trim()) continue
+      const event = JSON.parse(line)
+      if (event.type === 'sources' && onSources) onSources(event.sources)
+      if (event.type === 'token') {
+        answer += event.content
+        if (onToken) onToken(event.content)
+      }
+      if (event.type === 'error') {
+        answer += event.message
+        if (onToken) onToken(event.message)
+      }
+    }
+  }
+  return answer
+}
+
 export default api